@@ -1,5 +1,6 @@
 DEFAULT_PREFIX = "$"
 DEFAULT_COLOR = 0xffd700
+BET_ID_CHARSET = "0123456789abcdefghijklmnopqrstuvwxyz"
 
 CELEBRATORY_MSGS = [
 	"Drinks all around!",
@@ -9,4 +10,13 @@ CELEBRATORY_MSGS = [
 	"Sheeeeeeeeeessshh!"
 ]
 
-from .gooble import Gooble
+from .house import House
+
+def __getattr__(name):
+    # The bot pulls in all of discord.py, so it's only imported when asked for.
+    if name == "Gooble":
+        from .gooble import Gooble
+        return Gooble
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+            __name__, name))
@@ -3,9 +3,8 @@
 import os
 import sys
 
-from . import Gooble
-
-from .logs import getLogger
+from .logs import getLogger, setupLogging
+setupLogging()
 logger = getLogger()
 
 logger.info("Welcome to gooble")
@@ -14,5 +13,16 @@ if not token:
     logger.error("Please set the TOKEN environment variable")
     sys.exit(1)
 
-gooble = Gooble()
+if os.getenv("GOOBLE_REPLICA") and not os.getenv("GOOBLE_REPLICA_KEY"):
+    logger.error("Please set GOOBLE_REPLICA_KEY to a secret shared with " +
+            "the replica")
+    sys.exit(1)
+
+# Loading the bot pulls in discord.py, so hold off until we know we need it.
+from . import Gooble
+
+# Stream changes to a hot-standby replica, if one is listening, and record a
+# trace of every command, if asked to.
+gooble = Gooble(replica=os.getenv("GOOBLE_REPLICA"),
+        trace=os.getenv("GOOBLE_TRACE"))
 gooble.run(token)
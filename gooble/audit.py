@@ -0,0 +1,123 @@
+from .ledger import EntryTypes
+
+from .logs import getLogger
+logger = getLogger()
+
+class InvariantException(Exception):
+    pass
+
+# Entries that bring money into (or take it out of) the House as a whole.
+_MINTING = (EntryTypes.GRANT, EntryTypes.TAKE, EntryTypes.GIFT)
+
+# Entries that move money between a player and the stakes held by a bet.
+_ESCROW = (EntryTypes.STAKE, EntryTypes.REFUND, EntryTypes.PAYOUT)
+
+class MoneyTracker:
+    '''
+    Keeps running totals of the money in a House so the zero-sum invariant
+
+        player balances + open stakes + community pool == money supply
+
+    can be checked in constant time after every change. The supply only moves
+    when money is minted or burned (grants, takes, gifts and new players);
+    everything else just moves money around inside the House.
+    '''
+
+    def __init__(self, /, strict=False):
+        self.strict = strict
+
+        self.supply = 0
+        self.balances = 0
+
+        # The stakes held by each open bet.
+        self.escrow = {}
+        self.escrowed = 0
+
+    def open(self, player):
+        self.supply += player.balance
+        self.balances += player.balance
+
+    def retire(self, player):
+        self.supply -= player.balance
+        self.balances -= player.balance
+
+    '''
+    Applies a change to a player's balance, or to the community pool when
+    player is None.
+    '''
+    def apply(self, player, entry: EntryTypes, amount, bet=None):
+        if player is not None:
+            self.balances += amount
+
+            if entry in _MINTING:
+                self.supply += amount
+            elif entry in _ESCROW:
+                self._hold(bet, -amount)
+
+        # The community pool itself is read straight off the House.
+        elif entry is EntryTypes.HOUSE_TAKE:
+            self._hold(bet, -amount)
+
+    '''
+    Counts a stake that was placed before the tracker existed, such as one
+    on a bet loaded from storage.
+    '''
+    def restore(self, bet, amount):
+        self.supply += amount
+        self._hold(bet, amount)
+
+    def _hold(self, bet, amount):
+        self.escrow[bet.id] = self.escrow.get(bet.id, 0) + amount
+        self.escrowed += amount
+
+    def check(self, pool) -> bool:
+        drift = self.balances + pool + self.escrowed - self.supply
+        if drift:
+            # Report it once and keep tracking from here.
+            self.supply += drift
+            self._report("money supply drifted by {}".format(drift))
+            return False
+
+        return True
+
+    '''
+    Called once a bet is settled or canceled. Anything it still holds was
+    never paid back out.
+    '''
+    def close(self, bet) -> bool:
+        leftover = self.escrow.pop(bet.id, 0)
+        if not leftover:
+            return True
+
+        self.escrowed -= leftover
+
+        # The money is gone either way; keep tracking from here.
+        self.supply -= leftover
+        self._report("bet {} lost {} on settlement".format(bet.id, leftover))
+        return False
+
+    '''
+    Compares the running totals against totals recomputed from scratch and
+    resynchronizes with them.
+    '''
+    def audit(self, balances, escrowed, pool) -> bool:
+        ok = True
+        if balances != self.balances:
+            self._report("player balances are {}, tracked {}".format(
+                    balances, self.balances))
+            ok = False
+
+        if escrowed != self.escrowed:
+            self._report("open stakes are {}, tracked {}".format(
+                    escrowed, self.escrowed))
+            ok = False
+
+        self.balances = balances
+        self.escrowed = escrowed
+        return self.check(pool) and ok
+
+    def _report(self, msg):
+        if self.strict:
+            raise InvariantException(msg)
+
+        logger.error("zero-sum invariant broken; {}".format(msg))
@@ -2,10 +2,9 @@ import datetime
 from typing import Iterable, Tuple, Union
 from enum import Enum, auto
 
-from nanoid import generate
-
 from . import BET_ID_CHARSET
 
+from .ledger import EntryTypes
 from .player import Player
 from .util import partition
 
@@ -17,6 +16,7 @@ class GameTypes(Enum):
     WIN_LOSE        = auto()
     CLOSEST_WINS    = auto()
     YES_NO          = auto()
+    PARIMUTUEL      = auto()
 
 _BETS_BY_TYPE = {}
 def bind_game(name, gt: GameTypes, *nicks, description=''):
@@ -35,33 +35,184 @@ def bind_game(name, gt: GameTypes, *nicks, description=''):
 class BetException(Exception):
     pass
 
+'''
+Encodes a number as a bet id using the characters in BET_ID_CHARSET, so ids
+stay as short as the number allows.
+'''
+def encodeBetId(n: int) -> str:
+    base = len(BET_ID_CHARSET)
+
+    digits = []
+    while True:
+        n, digit = divmod(n, base)
+        digits.append(BET_ID_CHARSET[digit])
+        if not n:
+            break
+
+    return "".join(reversed(digits))
+
 # TODO: Metaclass
 class Bet:
+    '''
+    Whether players can enter the bet by reacting to its message.
+    '''
+    REACTIONS = False
+
+    '''
+    Whether the outcomes are named by whoever starts the bet.
+    '''
+    NAMED_OUTCOMES = False
+
     def __init__(self, stmt, **kwargs):
-        self.id = generate(BET_ID_CHARSET, 5)
+        # Ids are handed out by the House so they never collide.
+        self.id = kwargs.get("id")
+        if not self.id:
+            raise BetException("A bet must be given an id")
+
         self.statement = stmt
-        self.timeout = kwargs.get("timeout", 0)
-        self.min_bet = kwargs.get("min_bet", 0)
+        self.timeout = kwargs.get("timeout") or 0
+        self.min_bet = kwargs.get("min_bet") or 0
         self.created = datetime.datetime.now()
 
+        # Changes whenever a stake is placed, changed or withdrawn.
+        self.version = 0
+
+        # The channel the bet was started in, where it's the default bet.
+        self.channel = kwargs.get("channel")
+
+        # Set when a settled bet leaves counting its losers to the House: the
+        # pools of players who lost.
+        self.losers = None
+
+        # Reaction bets have one stake for everybody and live in a message.
+        self.fixed_stake = kwargs.get("stake") or 0
+        self.message = None
+
+        if self.fixed_stake and not self.REACTIONS:
+            raise BetException("{} bets can't be entered by reaction".format(
+                    self.FRIENDLY_NAME))
+
+        if kwargs.get("outcomes") and not self.NAMED_OUTCOMES:
+            raise BetException("{} bets already have their outcomes".format(
+                    self.FRIENDLY_NAME))
+
     def addPlayer(self, player, stake, wager):
         raise BetException("Not implemented")
 
+    def _checkTimeout(self):
+        if self.timeout > 0 and \
+            (datetime.datetime.now() - self.created).total_seconds() > self.timeout:
+            raise BetException("The timeout for this bet has expired.")
+
     '''
     Cancels the current bet and refunds any stakes.
     '''
     def cancel(self) -> Iterable[Tuple[Player, int]]:
         raise BetException("Not implemented in the base class.")
 
+    '''
+    Refunds a single player's stake, if they have one, regardless of the
+    timeout. Returns the refunded stake.
+    '''
+    def refundPlayer(self, player) -> int:
+        raise BetException("Not implemented in the base class.")
+
     def end(self, result):
+        return self._end(self.parseResult(result))
+
+    '''
+    Validates a result given by a user and converts it to the value used to
+    settle the bet.
+    '''
+    def parseResult(self, result):
         raise BetException("Not implemented")
 
+    def _end(self, result):
+        raise BetException("Not implemented")
+
+    '''
+    Returns a list of tuples corresponding to each distinct outcome of the bet
+    and the payout delta the given player would see if they placed the given
+    stake and wager. Nothing is mutated.
+    '''
+    def preview(self, player, stake, wager) -> Iterable[Tuple[str, int]]:
+        raise BetException("Not implemented by the base class.")
+
     '''
     Returns a list of tuples corresponding a player, their stake, and their wager.
     '''
     def getStakes(self) -> Iterable[Tuple[Player, int, Union[str, int]]]:
         raise BetException("Not implemented by the base class.")
 
+    @property
+    def json(self):
+        return {
+            "id": self.id,
+            "type": self.GAME_TYPE.value,
+            "statement": self.statement,
+            "timeout": self.timeout,
+            "min_bet": self.min_bet,
+            "created": self.created.timestamp(),
+            "stake": self.fixed_stake,
+            "message": self.message,
+            "channel": self.channel,
+            "stakes": self._stakesJSON()
+        }
+
+    '''
+    Rebuilds a bet from its json, resolving players through the given House.
+    Stakes are put back as they were; no money moves.
+    '''
+    @staticmethod
+    def fromJSON(value, house):
+        if value.get("type") not in _BETS_BY_TYPE:
+            raise BetException("Unknown game type {}".format(value.get("type")))
+
+        subcls, _ = _BETS_BY_TYPE[value["type"]]
+        self = subcls(value["statement"], id=value["id"],
+                timeout=value.get("timeout"), min_bet=value.get("min_bet"),
+                stake=value.get("stake"), outcomes=value.get("outcomes"),
+                channel=value.get("channel"))
+
+        self.created = datetime.datetime.fromtimestamp(value["created"])
+        self.message = value.get("message")
+        self._loadStakes(value.get("stakes", []), house)
+
+        return self
+
+    def _stakesJSON(self):
+        raise BetException("Not implemented by the base class.")
+
+    def _loadStakes(self, stakes, house):
+        raise BetException("Not implemented by the base class.")
+
+    @staticmethod
+    def _winnings(lsum, stake, wsum):
+        # A winner's share of the losing pool is proportional to their stake in
+        # the winning pool.
+        return lsum * stake // wsum if wsum else 0
+
+    '''
+    Splits the losing pool between winners in proportion to their stakes.
+    Every share is rounded down and the leftover units go to the largest
+    remainders, so the shares always add up to exactly the losing pool.
+    '''
+    @staticmethod
+    def _allocate(lsum, stakes: Iterable[int]) -> Iterable[int]:
+        wsum = sum(stakes)
+        if not wsum:
+            return [0] * len(stakes)
+
+        shares = [ lsum * stake // wsum for stake in stakes ]
+        leftover = lsum - sum(shares)
+
+        by_remainder = sorted(range(len(stakes)),
+                key=lambda i: lsum * stakes[i] % wsum, reverse=True)
+        for i in by_remainder[:leftover]:
+            shares[i] += 1
+
+        return shares
+
     @staticmethod
     def sortDeltas(deltas):
         # Sort by winnings
@@ -90,6 +241,10 @@ class BinaryBet(Bet):
     TRUTHY_KEYWORDS = []
     FALSEY_KEYWORDS = []
 
+    REACTIONS = True
+    TRUTHY_EMOJI = "\u2705"
+    FALSEY_EMOJI = "\u274c"
+
     @classmethod
     def _cast_keyword(cls, _kw: str) -> bool:
         kw = _kw.lower()
@@ -110,14 +265,18 @@ class BinaryBet(Bet):
 
     def addPlayer(self, player, stake, wager):
         wager = self._cast_keyword(wager)
+
+        # Reaction bets have the same stake for everybody, however they join.
+        if self.fixed_stake and stake != self.fixed_stake:
+            raise BetException("Everybody stakes {} on this bet".format(
+                    self.fixed_stake))
+
         self._addPlayer(player, stake, wager)
 
     def _addPlayer(self, player, stake, wager: bool):
 
         # Don't allow new stakes or updates to stakes if the timeout has expired.
-        if self.timeout > 0 and \
-            (datetime.datetime.now() - self.created).total_seconds() > self.timeout:
-            raise BetException("The timeout for this bet has expired.")
+        self._checkTimeout()
 
         # Don't allow stakes that are less than the minimum stake requirement.
         if self.min_bet > 0 and stake < self.min_bet:
@@ -129,24 +288,91 @@ class BinaryBet(Bet):
         record = self.falsey.pop(player.id, record)
         if record is not None:
             _, original_stake = record
-            player.grant(original_stake)
+            player.grant(original_stake, EntryTypes.REFUND, self)
 
         # The player should resubmit the bet now that they have their wager
         # returned
         if player.balance < stake:
             raise BetException("Balance too low; funds returned")
 
-        player.take(stake)
+        player.take(stake, EntryTypes.STAKE, self)
 
         pool = self.truthy if wager else self.falsey
         pool[player.id] = (player, stake)
 
+    def _removePlayer(self, player):
+        self._checkTimeout()
+        self.refundPlayer(player)
+
+    def refundPlayer(self, player) -> int:
+        record = self.truthy.pop(player.id, None)
+        record = self.falsey.pop(player.id, record)
+        if record is None:
+            return 0
+
+        _, stake = record
+        player.grant(stake, EntryTypes.REFUND, self)
+        return stake
+
+    '''
+    Returns the side the player has wagered on, or None if they haven't.
+    '''
+    def wagerOf(self, pid):
+        if pid in self.truthy:
+            return True
+        if pid in self.falsey:
+            return False
+        return None
+
+    @classmethod
+    def _cast_emoji(cls, emoji: str):
+        if emoji == cls.TRUTHY_EMOJI:
+            return True
+        if emoji == cls.FALSEY_EMOJI:
+            return False
+        return None
+
+    '''
+    Applies a batch of reaction events, given as (player, emoji, added) tuples
+    in the order they happened. Each player's events are folded into a single
+    change, which is then applied with the fixed stake; removing the reaction
+    for the side a player is on refunds them. Returns (player, exception)
+    tuples for the changes that couldn't be applied.
+    '''
+    def applyReactions(self, events):
+        wagers = {}
+        for player, emoji, added in events:
+            side = self._cast_emoji(emoji)
+            if side is None:
+                continue
+
+            _, current = wagers.get(player.id, (player, self.wagerOf(player.id)))
+            if added:
+                wagers[player.id] = (player, side)
+            elif current == side:
+                wagers[player.id] = (player, None)
+
+        failed = []
+        for player, wager in wagers.values():
+            if wager == self.wagerOf(player.id):
+                continue
+
+            try:
+                if wager is None:
+                    self._removePlayer(player)
+                else:
+                    self._addPlayer(player, self.fixed_stake, wager)
+            except BetException as e:
+                failed.append((player, e))
+
+        return failed
+
     def cancel(self) -> Iterable[Tuple[Player, int]]:
         all_players = list(self.truthy.values()) + list(self.falsey.values())
 
         for player, stake in all_players:
             # Give the player their money back.
-            player.grant(stake)
+            player.grant(stake, EntryTypes.REFUND, self)
 
             # Remove the player from the registered stakes.
             self.truthy.pop(player.id, None)
@@ -154,9 +380,8 @@ class BinaryBet(Bet):
 
         return all_players
 
-    def end(self, result):
-        result = self._cast_keyword(result)
-        return self._end(result)
+    def parseResult(self, result: str) -> bool:
+        return self._cast_keyword(result)
 
     def _end(self, result: bool):
         deltas = []
@@ -177,11 +402,10 @@ class BinaryBet(Bet):
             return deltas, lsum
 
         # Distribute to winners
-        wsum = sum(map(lambda v: v[1], winners.values()))
-        for (player, stake) in winners.values():
-            player.grant(stake)
-            winnings = int(lsum * (stake / wsum))
-            player.grant(winnings)
+        records = list(winners.values())
+        shares = self._allocate(lsum, [ stake for _, stake in records ])
+        for (player, stake), winnings in zip(records, shares):
+            player.grant(stake + winnings, EntryTypes.PAYOUT, self)
             player.add_win()
 
             deltas.append((player, winnings))
@@ -189,6 +413,39 @@ class BinaryBet(Bet):
         self.sortDeltas(deltas)
         return deltas, 0
 
+    def preview(self, player, stake, wager) -> Iterable[Tuple[str, int]]:
+        wager = self._cast_keyword(wager)
+
+        # Total up both pools as they would be with the player's current stake
+        # (if any) swapped for the hypothetical one.
+        sums = {}
+        for side, pool in ((True, self.truthy), (False, self.falsey)):
+            sums[side] = sum(s for pid, (_, s) in pool.items()
+                    if pid != player.id)
+        sums[wager] += stake
+
+        outcomes = []
+        for result, kw in ((True, self.TRUTHY_KEYWORDS[0]),
+                (False, self.FALSEY_KEYWORDS[0])):
+            if result == wager:
+                delta = self._winnings(sums[not wager], stake, sums[wager])
+            else:
+                delta = -stake
+
+            outcomes.append((kw, delta))
+
+        return outcomes
+
+    def _stakesJSON(self):
+        return [ [player.id, stake, side]
+                for side, pool in ((True, self.truthy), (False, self.falsey))
+                for player, stake in pool.values() ]
+
+    def _loadStakes(self, stakes, house):
+        for pid, stake, side in stakes:
+            pool = self.truthy if side else self.falsey
+            pool[pid] = (house.getPlayer(pid), stake)
+
     def getStakes(self) -> Iterable[Tuple[Player, int, Union[str, int]]]:
         # Create a list to hold the currently placed stakes.
         placed_stakes = []
@@ -213,6 +470,8 @@ class BinaryBet(Bet):
 class OverUnderBet(BinaryBet):
     TRUTHY_KEYWORDS = ["over", "o"]
     FALSEY_KEYWORDS = ["under", "u"]
+    TRUTHY_EMOJI = "\U0001f53c"
+    FALSEY_EMOJI = "\U0001f53d"
 
 @bind_game("Win/Lose", GameTypes.WIN_LOSE, "wl", "winlose",
     description="""A binary style bet where players wager whether or
@@ -231,6 +490,8 @@ class WinLoseBet(BinaryBet):
 class WinLoseBet(BinaryBet):
     TRUTHY_KEYWORDS = ["yes", "y"]
     FALSEY_KEYWORDS = ["no", "n"]
+    TRUTHY_EMOJI = "\U0001f44d"
+    FALSEY_EMOJI = "\U0001f44e"
 
 @bind_game("Closest Wins", GameTypes.CLOSEST_WINS, "cw", "closestwins",
     description="""A bet in which players predict the outcome of a
@@ -259,9 +520,7 @@ class ClosestWinsBet(Bet):
 
     def _addPlayer(self, player, stake, wager: int):
         # Don't allow new stakes or updates to stakes if the timeout has expired.
-        if self.timeout > 0 and \
-            (datetime.datetime.now() - self.created).total_seconds() > self.timeout:
-            raise BetException("The timeout for this bet has expired.")
+        self._checkTimeout()
 
         # Don't allow stakes that are less than the minimum stake requirement.
         if self.min_bet > 0 and stake < self.min_bet:
@@ -271,12 +530,12 @@ class ClosestWinsBet(Bet):
         record = self.betters.pop(player.id, None)
         if record is not None:
             _, original_stake, *_ = record
-            player.grant(original_stake)
+            player.grant(original_stake, EntryTypes.REFUND, self)
 
         if player.balance < stake:
             raise BetException("Balance too low; funds returned")
 
-        player.take(stake)
+        player.take(stake, EntryTypes.STAKE, self)
         self.betters[player.id] = (player, stake, wager)
 
     def cancel(self) -> Iterable[Tuple[Player, int]]:
@@ -284,20 +543,32 @@ class ClosestWinsBet(Bet):
 
         for player, stake, _ in all_players:
             # Give the player their money back.
-            player.grant(stake)
+            player.grant(stake, EntryTypes.REFUND, self)
 
             # Remove the player from the registered stakes.
             self.betters.pop(player.id, None)
 
         return all_players
 
-    def end(self, result: str):
-        result = self._validate_input(result)
-        return self._end(result)
+    def refundPlayer(self, player) -> int:
+        record = self.betters.pop(player.id, None)
+        if record is None:
+            return 0
+
+        _, stake, _ = record
+        player.grant(stake, EntryTypes.REFUND, self)
+        return stake
+
+    def parseResult(self, result: str) -> int:
+        return self._validate_input(result)
 
     def _end(self, result: int):
         deltas = []
 
+        # Nobody placed a stake, so there is nothing to settle.
+        if not self.betters:
+            return deltas, 0
+
         # map betters to a list of offsets from result
         min_ofs = min(map(lambda record: abs(result - record[2]),
                 self.betters.values()))
@@ -316,11 +587,9 @@ class ClosestWinsBet(Bet):
             deltas.append((player, -stake))
 
         # restore winners funds and distribute
-        wsum = sum(map(lambda record: record[1], winners))
-        for player, stake, _ in winners:
-            player.grant(stake)
-            winnings = int(lsum * (stake / wsum))
-            player.grant(winnings)
+        shares = self._allocate(lsum, [ stake for _, stake, _ in winners ])
+        for (player, stake, _), winnings in zip(winners, shares):
+            player.grant(stake + winnings, EntryTypes.PAYOUT, self)
             player.add_win()
 
             deltas.append((player, winnings))
@@ -328,12 +597,242 @@ class ClosestWinsBet(Bet):
         self.sortDeltas(deltas)
         return deltas, 0
 
+    def preview(self, player, stake, wager: str) -> Iterable[Tuple[str, int]]:
+        wager = self._validate_input(wager)
+
+        # Anybody with the same prediction shares the win; everyone else feeds
+        # the losing pool. The nearest predictions on either side bound the
+        # range of results for which the player wins.
+        wsum, lsum = stake, 0
+        lower, higher = None, None
+        for pid, (_, s, w) in self.betters.items():
+            if pid == player.id:
+                continue
+
+            if w == wager:
+                wsum += s
+                continue
+
+            lsum += s
+            if w < wager and (lower is None or w > lower):
+                lower = w
+            elif w > wager and (higher is None or w < higher):
+                higher = w
+
+        # Integer results strictly closer to the wager than to a neighbour.
+        lo = (lower + wager) // 2 + 1 if lower is not None else None
+        hi = -(-(wager + higher) // 2) - 1 if higher is not None else None
+
+        if lo is None and hi is None:
+            label = "any result"
+        elif lo is None:
+            label = "{} or less".format(hi)
+        elif hi is None:
+            label = "{} or more".format(lo)
+        else:
+            label = "{} to {}".format(lo, hi)
+
+        return [
+            (label, self._winnings(lsum, stake, wsum)),
+            ("otherwise", -stake)
+        ]
+
+    def _stakesJSON(self):
+        return [ [player.id, stake, wager]
+                for player, stake, wager in self.betters.values() ]
+
+    def _loadStakes(self, stakes, house):
+        for pid, stake, wager in stakes:
+            self.betters[pid] = (house.getPlayer(pid), stake, wager)
+
     def getStakes(self) -> Iterable[Tuple[Player, int, Union[str, int]]]:
         # Create a list to hold the currently placed stakes.
-        placed_stakes = self.betters.values()
+        placed_stakes = list(self.betters.values())
 
         # Sort the stakes based on their targets.
         placed_stakes.sort(key=lambda x: x[2])
 
         return placed_stakes
 
+@bind_game("Parimutuel", GameTypes.PARIMUTUEL, "pm", "parimutuel", "pool",
+    description="""A bet on which of several named outcomes happens, such
+    as which team wins a tournament. All stakes go into one pool, and the
+    players who picked the winning outcome split everything staked on the
+    other outcomes in proportion to their stakes.""")
+class ParimutuelBet(Bet):
+    NAMED_OUTCOMES = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.outcomes = list(kwargs.get("outcomes") or [])
+        if len(self.outcomes) < 2:
+            raise BetException(
+                    "{} bets need at least two outcomes to pick from".format(
+                        self.FRIENDLY_NAME))
+
+        # Maps the lowercase name of each outcome to its index.
+        self._index = {}
+        for i, outcome in enumerate(self.outcomes):
+            if self._index.setdefault(outcome.lower(), i) != i:
+                raise BetException(
+                        "'{}' is given as an outcome more than once".format(
+                            outcome))
+
+        # The stakes on each outcome, kept per outcome and in total so odds
+        # and settlement never need to look at every stake.
+        self.members = [ {} for _ in self.outcomes ]
+        self.totals = [0] * len(self.outcomes)
+        self.total = 0
+
+        # Maps each player's id to the outcome they picked.
+        self.wagers = {}
+
+    '''
+    Resolves an outcome by its name or its number (counting from 1).
+    '''
+    def _cast_outcome(self, value: str) -> int:
+        i = self._index.get(value.lower(), None)
+        if i is not None:
+            return i
+
+        if value.isdigit() and 1 <= int(value) <= len(self.outcomes):
+            return int(value) - 1
+
+        raise BetException(
+                "'{}' is not one of the outcomes for this bet; try {}".format(
+                    value, self.outcomes))
+
+    def addPlayer(self, player, stake, wager):
+        wager = self._cast_outcome(wager)
+        self._addPlayer(player, stake, wager)
+
+    def _addPlayer(self, player, stake, wager: int):
+        # Don't allow new stakes or updates to stakes if the timeout has expired.
+        self._checkTimeout()
+
+        # Don't allow stakes that are less than the minimum stake requirement.
+        if self.min_bet > 0 and stake < self.min_bet:
+            raise BetException("The stake must be greater than or " +
+                "equal to the minimum bet ({}).".format(self.min_bet))
+
+        # Avoid duplication
+        self.refundPlayer(player)
+
+        # The player should resubmit the bet now that they have their wager
+        # returned
+        if player.balance < stake:
+            raise BetException("Balance too low; funds returned")
+
+        player.take(stake, EntryTypes.STAKE, self)
+
+        self.members[wager][player.id] = (player, stake)
+        self.totals[wager] += stake
+        self.total += stake
+        self.wagers[player.id] = wager
+
+    def refundPlayer(self, player) -> int:
+        wager = self.wagers.pop(player.id, None)
+        if wager is None:
+            return 0
+
+        _, stake = self.members[wager].pop(player.id)
+        self.totals[wager] -= stake
+        self.total -= stake
+
+        player.grant(stake, EntryTypes.REFUND, self)
+        return stake
+
+    def cancel(self) -> Iterable[Tuple[Player, int]]:
+        all_players = [ record for members in self.members
+                for record in members.values() ]
+
+        for player, _ in all_players:
+            self.refundPlayer(player)
+
+        return all_players
+
+    def parseResult(self, result: str) -> int:
+        return self._cast_outcome(result)
+
+    '''
+    Only the winners are settled here and returned in the deltas. Stakes
+    were taken when they were placed, so the losers' money doesn't move; the
+    House counts their losses later from the losing pools.
+    '''
+    def _end(self, result: int):
+        deltas = []
+
+        lsum = self.total - self.totals[result]
+        self.losers = [ members for i, members in enumerate(self.members)
+                if i != result and members ]
+
+        # If nobody picked the winning outcome, the house wins everything
+        # (community pool).
+        winners = self.members[result]
+        if not winners:
+            return deltas, lsum
+
+        records = list(winners.values())
+        shares = self._allocate(lsum, [ stake for _, stake in records ])
+        for (player, stake), winnings in zip(records, shares):
+            player.grant(stake + winnings, EntryTypes.PAYOUT, self)
+            player.add_win()
+
+            deltas.append((player, winnings))
+
+        self.sortDeltas(deltas)
+        return deltas, 0
+
+    '''
+    Returns each outcome with the total staked on it and what one unit
+    staked on it would pay back in total if it won, or None if nobody has
+    picked it yet.
+    '''
+    def odds(self) -> Iterable[Tuple[str, int, float]]:
+        return [ (outcome, staked, self.total / staked if staked else None)
+                for outcome, staked in zip(self.outcomes, self.totals) ]
+
+    def preview(self, player, stake, wager) -> Iterable[Tuple[str, int]]:
+        wager = self._cast_outcome(wager)
+
+        # Take the player's current stake (if any) out of the pools.
+        wsum, total = self.totals[wager], self.total
+        current = self.wagers.get(player.id, None)
+        if current is not None:
+            _, placed = self.members[current][player.id]
+            total -= placed
+            if current == wager:
+                wsum -= placed
+
+        wsum += stake
+        total += stake
+
+        return [
+            (self.outcomes[wager], self._winnings(total - wsum, stake, wsum)),
+            ("any other outcome", -stake)
+        ]
+
+    @property
+    def json(self):
+        value = super().json
+        value["outcomes"] = self.outcomes
+        return value
+
+    def _stakesJSON(self):
+        return [ [player.id, stake, wager]
+                for wager, members in enumerate(self.members)
+                for player, stake in members.values() ]
+
+    def _loadStakes(self, stakes, house):
+        for pid, stake, wager in stakes:
+            self.members[wager][pid] = (house.getPlayer(pid), stake)
+            self.totals[wager] += stake
+            self.total += stake
+            self.wagers[pid] = wager
+
+    def getStakes(self) -> Iterable[Tuple[Player, int, Union[str, int]]]:
+        return [ (player, stake, outcome)
+                for outcome, members in zip(self.outcomes, self.members)
+                for player, stake in members.values() ]
+
@@ -0,0 +1,115 @@
+import re
+
+import discord
+from discord.ext import commands
+
+from . import DEFAULT_COLOR
+
+_MENTION = re.compile(r"<@!?([0-9]+)>$")
+
+class Mention(commands.Converter):
+    '''
+    Resolves a member from the mentions Discord already attached to the
+    message, falling back to the guild's member cache, so converting an
+    argument never makes an API call.
+    '''
+    async def convert(self, ctx, argument):
+        match = _MENTION.match(argument)
+        if match:
+            mid = int(match.group(1))
+            for member in ctx.message.mentions:
+                if member.id == mid:
+                    return member
+        elif argument.isdigit():
+            mid = int(argument)
+        else:
+            member = ctx.guild.get_member_named(argument)
+            if member is not None:
+                return member
+            mid = None
+
+        member = ctx.guild.get_member(mid) if mid is not None else None
+        if member is None:
+            raise commands.BadArgument(
+                    "Member '{}' not found".format(argument))
+
+        return member
+
+# Discord rejects embeds with a field value longer than this.
+FIELD_LIMIT = 1024
+
+'''
+Joins lines into as few field values as it takes to keep each one under the
+limit, cutting any line that wouldn't fit on its own.
+'''
+def fieldValues(lines, /, limit=FIELD_LIMIT):
+    fields, field = [], []
+    for line in lines:
+        line = line[:limit]
+        if field and len("\n".join(field + [line])) > limit:
+            fields.append("\n".join(field))
+            field = []
+        field.append(line)
+    if field:
+        fields.append("\n".join(field))
+
+    return fields
+
+# Help embeds are rendered the first time they're asked for. The help command
+# is copied for every invocation, so they're kept here rather than on it.
+_HELP_EMBEDS = {}
+
+class HelpCommand(commands.HelpCommand):
+    FIELD_LIMIT = FIELD_LIMIT
+
+    def _usage(self, command):
+        return "{}{} {}".format(self.clean_prefix, command.qualified_name,
+                command.signature).rstrip()
+
+    def _embed(self, key, render):
+        embed = _HELP_EMBEDS.get(key, None)
+        if embed is None:
+            embed = _HELP_EMBEDS[key] = render()
+
+        return embed
+
+    def _renderBot(self, mapping):
+        embed = discord.Embed(
+                title="Command Help",
+                description="Use `{}help <command>` for more on a command."
+                        .format(self.clean_prefix),
+                color=DEFAULT_COLOR
+        )
+
+        visible = sorted((command for cmds in mapping.values()
+                for command in cmds if not command.hidden),
+                key=lambda command: command.name)
+
+        lines = [ "`{}` {}".format(self._usage(command), command.short_doc)
+                for command in visible ]
+
+        for i, value in enumerate(fieldValues(lines, self.FIELD_LIMIT)):
+            embed.add_field(
+                name="Commands" if i == 0 else "\u200b",
+                value=value,
+                inline=False
+            )
+
+        return embed
+
+    def _renderCommand(self, command):
+        return discord.Embed(
+                title=self._usage(command),
+                description=command.help or "\u200b",
+                color=DEFAULT_COLOR
+        )
+
+    async def send_bot_help(self, mapping):
+        embed = self._embed((self.clean_prefix, None),
+                lambda: self._renderBot(mapping))
+        await self.get_destination().send(embed=embed)
+
+    async def send_command_help(self, command):
+        embed = self._embed((self.clean_prefix, command.qualified_name),
+                lambda: self._renderCommand(command))
+        await self.get_destination().send(embed=embed)
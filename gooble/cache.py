@@ -0,0 +1,48 @@
+from collections import OrderedDict
+
+import discord
+
+class EmbedCache:
+    '''
+    A least recently used cache of rendered embeds, keyed by (house, view,
+    args). Every entry is tagged with the version counters it was rendered
+    from and is only served while the caller's tag still matches, so nothing
+    ever has to be invalidated explicitly.
+    '''
+    MAX_SIZE = 512
+
+    def __init__(self, /, maxsize=MAX_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, tag) -> discord.Embed:
+        entry = self._entries.get(key, None)
+        if entry is None or entry[0] != tag:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        # Hand out a fresh embed so callers can't change the cached payload.
+        return discord.Embed.from_dict(entry[1])
+
+    def put(self, key, tag, embed: discord.Embed):
+        self._entries[key] = (tag, embed.to_dict())
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return (self.hits / requests) * 100 if requests else 0
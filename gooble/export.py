@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+'''
+Streams players, open bets or transactions out of the bot's storage as CSV or
+JSON lines.
+
+    python -m gooble.export players -o players.csv
+    python -m gooble.export bets --game pm --format jsonl -o bets.jsonl
+    python -m gooble.export transactions --house 1234 --since 2022-01-01 \
+            --game ou --format jsonl --shard-size 100000 -o tx.jsonl
+
+Records flow through a chain of generators straight to the output, so memory
+stays flat however large the guilds are. With --workers, houses (or ledger
+segments) are decoded and filtered on a pool of processes while this one
+writes the results out in order; --progress reports how many are done.
+'''
+
+import os
+import sys
+import csv
+import dbm
+import json
+import shelve
+import argparse
+import datetime
+
+from .bet import GameTypes, _BETS_BY_TYPE
+from .ledger import Ledger
+from .maintenance import MaintenanceExecutor
+from .storage import iterHouses
+
+PLAYER_FIELDS = ["house", "id", "balance", "wins", "losses", "archived"]
+BET_FIELDS = ["house", "id", "type", "statement", "channel", "created",
+        "stakes"]
+TRANSACTION_FIELDS = ["time", "type", "house", "player", "bet", "game",
+        "amount", "balance"]
+
+class ExportException(Exception):
+    pass
+
+def playerRows(houseDict):
+    for archived, key in ((False, "players"), (True, "archived")):
+        for player in houseDict.get(key, []):
+            yield {
+                "house": houseDict["id"],
+                "id": player["id"],
+                "balance": player["balance"],
+                "wins": player.get("wins", 0),
+                "losses": player.get("losses", 0),
+                "archived": archived
+            }
+
+def players(db, /, houses=None):
+    for houseDict in iterHouses(db, houses):
+        yield from playerRows(houseDict)
+
+'''
+The open bets saved with a house, one row each. Stakes is the total staked.
+'''
+def betRows(houseDict, /, since=None, until=None, games=None):
+    since = since.timestamp() if since else None
+    until = until.timestamp() if until else None
+
+    for bet in houseDict.get("bets", []):
+        if since is not None and bet["created"] < since:
+            continue
+        if until is not None and bet["created"] >= until:
+            continue
+        if games is not None and bet["type"] not in games:
+            continue
+
+        yield {
+            "house": houseDict["id"],
+            "id": bet["id"],
+            "type": GameTypes(bet["type"]).name,
+            "statement": bet["statement"],
+            "channel": bet.get("channel"),
+            "created": datetime.datetime.fromtimestamp(
+                    bet["created"]).isoformat(),
+            "stakes": sum(stake for _, stake, _ in bet["stakes"])
+        }
+
+def bets(db, /, houses=None, **filters):
+    for houseDict in iterHouses(db, houses):
+        yield from betRows(houseDict, **filters)
+
+def transactions(path, /, houses=None, since=None, until=None, games=None,
+        segments=None):
+    houses = set(map(str, houses)) if houses else None
+    since = since.timestamp() if since else None
+    until = until.timestamp() if until else None
+
+    for entry in Ledger.scan(path, segments=segments):
+        if houses is not None and str(entry.house) not in houses:
+            continue
+        if since is not None and entry.timestamp < since:
+            continue
+        if until is not None and entry.timestamp >= until:
+            continue
+        if games is not None and entry.game not in games:
+            continue
+
+        yield {
+            "time": entry.time.isoformat(),
+            "type": entry.type.name,
+            "house": entry.house,
+            "player": entry.player,
+            "bet": entry.bet,
+            "game": GameTypes(entry.game).name if entry.game is not None \
+                    else None,
+            "amount": entry.amount,
+            "balance": entry.balance
+        }
+
+'''
+Maps game nicknames (as used to start bets) to game type values.
+'''
+def gameTypes(nicks):
+    values = set()
+    for nick in nicks:
+        for value, (_, names) in _BETS_BY_TYPE.items():
+            if nick.lower() in [ n.lower() for n in names ]:
+                values.add(value)
+                break
+        else:
+            raise ExportException("Unknown game type '{}'".format(nick))
+
+    return values
+
+class ShardedWriter:
+    '''
+    Writes records to a file, or to stdout for "-". With a shard size, a new
+    file is started every shard_size records and a shard number is added to
+    the file name.
+    '''
+
+    def __init__(self, path, fields, /, fmt="csv", shard_size=0):
+        self.path = path
+        self.fields = fields
+        self.fmt = fmt
+        self.shard_size = shard_size
+
+        self._file = None
+        self._writer = None
+        self._shard = 0
+        self._written = 0
+
+    def _shardPath(self):
+        if not self.shard_size:
+            return self.path
+
+        root, ext = os.path.splitext(self.path)
+        return "{}-{:05d}{}".format(root, self._shard, ext)
+
+    def _open(self):
+        if self.path == "-":
+            self._file = sys.stdout
+        else:
+            self._file = open(self._shardPath(), "w", newline="")
+
+        if self.fmt == "csv":
+            self._writer = csv.DictWriter(self._file, self.fields)
+            self._writer.writeheader()
+
+    def _close(self):
+        if self._file is not None and self._file is not sys.stdout:
+            self._file.close()
+        self._file = None
+
+    def write(self, record):
+        if self._file is None:
+            self._open()
+
+        if self.fmt == "csv":
+            self._writer.writerow(record)
+        else:
+            self._file.write(json.dumps(record) + "\n")
+
+        self._written += 1
+        if self.shard_size and self._written % self.shard_size == 0 \
+                and self.path != "-":
+            self._close()
+            self._shard += 1
+
+    def close(self):
+        self._close()
+
+def _houseRows(houseDict):
+    return list(playerRows(houseDict))
+
+def _betRows(query):
+    houseDict, filters = query
+    return list(betRows(houseDict, **filters))
+
+def _segmentRows(query):
+    path, segment, filters = query
+    return list(transactions(path, segments=[segment], **filters))
+
+def _rows(results):
+    for _, rows, error in results:
+        if error is not None:
+            raise error
+
+        yield from rows
+
+def parallelPlayers(executor, db, /, houses=None, progress=None):
+    items = enumerate(iterHouses(db, houses))
+    return _rows(executor.imap(_houseRows, items, progress=progress))
+
+def parallelBets(executor, db, /, houses=None, progress=None, **filters):
+    items = enumerate((houseDict, filters)
+            for houseDict in iterHouses(db, houses))
+    return _rows(executor.imap(_betRows, items, progress=progress))
+
+def parallelTransactions(executor, path, /, progress=None, **filters):
+    segments = Ledger._segments(path)
+    items = enumerate((path, segment, filters) for segment in segments)
+    return _rows(executor.imap(_segmentRows, items, progress=progress,
+            total=len(segments)))
+
+'''
+Returns a progress callback for the executor that keeps a count of the
+finished work items on one line of stderr.
+'''
+def progressReporter(unit, /, file=sys.stderr):
+    def report(done, total):
+        print("\r{}{} {} done".format(done,
+                "/{}".format(total) if total else "", unit),
+                end="", file=file, flush=True)
+
+    return report
+
+def export(records, writer) -> int:
+    count = 0
+    try:
+        for record in records:
+            writer.write(record)
+            count += 1
+    finally:
+        writer.close()
+
+    return count
+
+def _time(value):
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+                "'{}' is not an ISO date or time".format(value))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gooble.export",
+            description="Export players, open bets or transactions from " +
+                "gooble's storage.")
+    parser.add_argument("kind", choices=["players", "bets", "transactions"])
+    parser.add_argument("-o", "--output", default="-",
+            help="file to write to (default: stdout)")
+    parser.add_argument("-f", "--format", choices=["csv", "jsonl"],
+            default="csv")
+    parser.add_argument("--house", action="append",
+            help="only export this house (repeatable)")
+    parser.add_argument("--since", type=_time,
+            help="only transactions or bets at or after this time")
+    parser.add_argument("--until", type=_time,
+            help="only transactions or bets before this time")
+    parser.add_argument("--game", action="append",
+            help="only transactions and bets of this game type (repeatable)")
+    parser.add_argument("--shard-size", type=int, default=0,
+            help="start a new output file every this many records")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+            help="split the work across this many processes")
+    parser.add_argument("--progress", action="store_true",
+            help="report the houses or ledger segments done on stderr")
+    parser.add_argument("--db", default="gooble.db")
+    parser.add_argument("--ledger", default="gooble.ledger")
+    args = parser.parse_args(argv)
+
+    # Progress is counted in work items, which only the executor hands out.
+    executor = MaintenanceExecutor(args.workers) \
+            if args.workers > 1 or args.progress else None
+    progress = progressReporter("segments" if args.kind == "transactions"
+            else "houses") if args.progress else None
+    try:
+        filters = {
+            "since": args.since,
+            "until": args.until,
+            "games": gameTypes(args.game) if args.game else None
+        }
+
+        if args.kind == "players":
+            if args.since or args.until or args.game:
+                parser.error("time and game filters don't apply to players")
+
+            writer = ShardedWriter(args.output, PLAYER_FIELDS,
+                    fmt=args.format, shard_size=args.shard_size)
+            with shelve.open(args.db, "r") as db:
+                if executor:
+                    records = parallelPlayers(executor, db, houses=args.house,
+                            progress=progress)
+                else:
+                    records = players(db, houses=args.house)
+                count = export(records, writer)
+        elif args.kind == "bets":
+            writer = ShardedWriter(args.output, BET_FIELDS,
+                    fmt=args.format, shard_size=args.shard_size)
+            with shelve.open(args.db, "r") as db:
+                if executor:
+                    records = parallelBets(executor, db, houses=args.house,
+                            progress=progress, **filters)
+                else:
+                    records = bets(db, houses=args.house, **filters)
+                count = export(records, writer)
+        else:
+            filters["houses"] = args.house
+
+            writer = ShardedWriter(args.output, TRANSACTION_FIELDS,
+                    fmt=args.format, shard_size=args.shard_size)
+            if executor:
+                records = parallelTransactions(executor, args.ledger,
+                        progress=progress, **filters)
+            else:
+                records = transactions(args.ledger, **filters)
+            count = export(records, writer)
+    except ExportException as e:
+        parser.error(str(e))
+    except dbm.error as e:
+        parser.error("could not open {}; {}".format(args.db, e))
+    finally:
+        if executor:
+            executor.close()
+
+    if progress:
+        print(file=sys.stderr)
+    print("Exported {} {}".format(count, args.kind), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
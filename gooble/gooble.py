@@ -1,16 +1,27 @@
 import asyncio
 import shelve
-import argparse
+import time
 from random import choice
+from typing import Optional
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 from . import DEFAULT_PREFIX, DEFAULT_COLOR, CELEBRATORY_MSGS
 
-from .bet import Bet, BetException, _BETS_BY_TYPE
+from .bet import Bet, BetException, _BETS_BY_TYPE, encodeBetId
+from .cache import EmbedCache
+from .history import sparkline
 from .house import House, HouseException
+from .ledger import EntryTypes, Ledger
+from .limits import CHEAP, EXPENSIVE, RateLimited
 from .player import Player, LeaderboardTypes
+from .reactions import ReactionBatcher
+from .replica import Primary, parseAddress
+from .trace import TraceRecorder
+from .storage import iterHouses, saveHouses
+from .botutil import HelpCommand, Mention, fieldValues
+from .util import chunked
 
 from .logs import getLogger
 logger = getLogger()
@@ -35,25 +46,48 @@ async def bonk(ctx):
 
 class Gooble(commands.Bot):
     DB_NAME = "gooble.db"
+    LEDGER_PATH = "gooble.ledger"
+    AUDIT_MINUTES = 30
+    RECONCILE_HOURS = 6
+    RECONCILE_CHUNK = 500
 
-    def __init__(self, *args, **kwargs):
+    # The most transactions listed at once.
+    MAX_TRANSACTIONS = 25
+
+    # How long cached embeds can show a player's old name after a rename.
+    NAMES_MINUTES = 10
+
+    def __init__(self, *args, replica=None, trace=None, **kwargs):
 
         intents = discord.Intents.default()
         intents.messages = True
 
         kwargs.setdefault("command_prefix", DEFAULT_PREFIX)
         kwargs.setdefault("intents", intents)
+        kwargs.setdefault("help_command", HelpCommand())
         super().__init__(*args, **kwargs)
 
         self.houses = {}
+        self.ledger = Ledger(self.LEDGER_PATH)
+        self.reactions = ReactionBatcher(self.applyReactions)
+        self.embeds = EmbedCache()
+
+        # Streams changes to a hot-standby follower, if one is configured.
+        self.replica = Primary(parseAddress(replica)) if replica else None
+
+        # Records every command for replaying later, if asked to.
+        self.tracer = TraceRecorder(trace) if trace else None
 
         # Continue initialization after we are connected
         self.listen("on_connect")(self.restoreState)
 
+        self.listen("on_raw_reaction_add")(self.onReactionAdd)
+        self.listen("on_raw_reaction_remove")(self.onReactionRemove)
+
     # Decorator that allows us to add commands to the gooble class. Special
     # attributes are added to these commands
     @classmethod
-    def command(cls, *deco_args, **deco_kwargs):
+    def command(cls, *deco_args, cost=CHEAP, **deco_kwargs):
         def _nameFromMember(ctx, /, member=None):
             member = ctx.author if member is None else member
             return member.nick if member.nick else member.name
@@ -64,22 +98,57 @@ class Gooble(commands.Bot):
                 return _nameFromMember(ctx, member)
             except Exception as e:
                 logger.error("could not get player name; {}".format(e))
+
+                # Whatever shows this name mustn't be cached.
+                ctx.unnamed = True
                 return "Unknown Player"
 
         def decorator(func):
             async def on_error(ctx, error):
+                # Keep quiet about calls turned away after the first.
+                if isinstance(error.__cause__, RateLimited):
+                    if error.__cause__.notify:
+                        await ctx.send(error.__cause__)
+                    return
+
+                # Point malformed calls at the usage for the command.
+                if isinstance(error, commands.UserInputError):
+                    await ctx.send(error)
+                    await ctx.send_help(ctx.command)
+                    return
+
                 e = error.__cause__ if error.__cause__ else error
                 await ctx.send(e)
 
+            async def on_done(ctx):
+                ctx.bot.replicate()
+                ctx.bot.traceCommand(ctx)
+
             async def on_call(ctx):
                 logger.info("Request '{}'".format(func.__name__.upper()))
                 house = ctx.bot.getHouse(ctx.guild)
+
+                # Turn away spam before doing any real work. Errors from
+                # here only reach on_error as CommandErrors.
+                try:
+                    if cost is not None:
+                        house.limiter.check(ctx.author.id, cost)
+                except RateLimited as e:
+                    raise commands.CommandError(str(e)) from e
+
                 player = house.getPlayer(ctx.author.id)
 
+                # Remembered for the trace, if one is being recorded.
+                setattr(ctx, "trace_start", time.perf_counter())
+                setattr(ctx, "trace_bets", house.bet_counter)
+
                 setattr(ctx, "house", house)
                 setattr(ctx, "player", player)
                 setattr(ctx, "playerName",
                         lambda player: _playerName(ctx, player))
+                setattr(ctx, "unnamed", False)
+                setattr(ctx, "names_epoch",
+                        int(time.time() // (ctx.bot.NAMES_MINUTES * 60)))
                 setattr(ctx, "memberName",
                         lambda member: _nameFromMember(ctx, member))
                 setattr(ctx, "author_name", _nameFromMember(ctx, ctx.author))
@@ -87,6 +156,7 @@ class Gooble(commands.Bot):
             # Pass to the actual command decorator
             command = commands.command(*deco_args, **deco_kwargs)(func)
             command.before_invoke(on_call)
+            command.after_invoke(on_done)
             command.error(on_error)
 
             if not hasattr(cls, "_gooble_commands"):
@@ -104,20 +174,13 @@ class Gooble(commands.Bot):
         logger.debug("Rebuilding internal state")
         with shelve.open(self.DB_NAME) as db:
 
-            # The database should be a dictionary where each key is a House ID and its
-            # corresponding value is a House definition dictionary.
-            for houseDict in db.get("houses", []):
-
-                import json
-                print(json.dumps(houseDict))
-
+            # Each House is saved as a House definition dictionary.
+            for houseDict in iterHouses(db):
                 newHouse = House.fromJSON(houseDict)
-                self.houses[newHouse.id] = newHouse
+                self.adoptHouse(newHouse)
 
-            # TODO: Do some post processing to check that all the loaded guilds
-            # actually exist. For each guild that does exist, check that all of its
-            # members exist. For any House or Player that doesn't exist, remove it
-            # from the corresponding map.
+            # Houses and players that no longer exist are cleaned up by the
+            # reconcile task.
 
         self.add_command(bonk)
 
@@ -125,43 +188,212 @@ class Gooble(commands.Bot):
         for command in getattr(self, "_gooble_commands", []):
             logger.debug("Adding command: {}".format(command.name))
             self.add_command(command)
+
+        if not self.auditHouses.is_running():
+            self.auditHouses.start()
+        if not self.reconcile.is_running():
+            self.reconcile.start()
+
         logger.debug("Bot initialized")
 
+    # Double check the running money totals of every house now and then.
+    @tasks.loop(minutes=AUDIT_MINUTES)
+    async def auditHouses(self):
+        for house in list(self.houses.values()):
+            if not house.audit():
+                logger.error("audit failed for house {}".format(house.id))
+
+            # Don't hold up command handling for the whole sweep.
+            await asyncio.sleep(0)
+
+        # Have the replica check its copy while we're at it.
+        if self.replica is not None:
+            self.replica.check(self.houses)
+
+    # Drop houses for guilds the bot has left and archive players who have
+    # left their guild. Everything is done in small steps with yields in
+    # between so command handling carries on while it runs.
+    @tasks.loop(hours=RECONCILE_HOURS)
+    async def reconcile(self):
+        # Listing a guild's members needs the members intent.
+        members = self.intents.members
+
+        for hid in list(self.houses):
+            guild = self.get_guild(hid)
+            if guild is None:
+                self.houses.pop(hid, None)
+                if self.replica is not None:
+                    self.replica.dropHouse(hid)
+                logger.info("Dropped house {}; guild is gone".format(hid))
+            elif members:
+                await self.reconcileHouse(guild)
+
+            await asyncio.sleep(0)
+
+    @reconcile.before_loop
+    async def beforeReconcile(self):
+        # The guild cache isn't complete until the bot is ready.
+        await self.wait_until_ready()
+
+        if not self.intents.members:
+            logger.warning("The members intent is off, so players who left " +
+                    "their guild won't be archived")
+
+    async def reconcileHouse(self, guild):
+        house = self.houses.get(guild.id, None)
+        if house is None:
+            return
+
+        # Members come back a page at a time, so this yields as it goes.
+        members = set()
+        try:
+            async for member in guild.fetch_members(limit=None):
+                members.add(member.id)
+        except (discord.ClientException, discord.HTTPException) as e:
+            logger.error("could not list members of {}; {}".format(guild.id, e))
+            return
+
+        departed = [ pid for pid in house.players if pid not in members ]
+        for pids in chunked(departed, self.RECONCILE_CHUNK):
+            house.removePlayers(pids)
+            await asyncio.sleep(0)
+
+        if departed:
+            logger.info("Archived {} player(s) from house {}".format(
+                    len(departed), guild.id))
+            self.replicate()
+
     async def close(self, *args, **kwargs):
+        self.auditHouses.cancel()
+        self.reconcile.cancel()
+
+        # Reactions still in their window are applied while we can still
+        # edit their messages.
+        await self.reactions.close()
         await super().close(*args, **kwargs)
 
         # Save just the players and their balances per house id so we don't get
         # in trouble later with trying to unpickle classes
         logger.debug("Saving state to db")
-        houses = []
         with shelve.open(self.DB_NAME) as db:
-            houses = list(map(lambda k: k.json, self.houses.values()))
-            db["houses"] = houses
+            saveHouses(db, self.houses.values())
+
+        # Only say goodbye to the replica once the state is safely saved.
+        if self.replica is not None:
+            self.replicate()
+            self.replica.close()
 
+        if self.tracer is not None:
+            self.tracer.close()
+
+        self.ledger.close()
         logger.debug("State saved")
 
+    async def onReactionAdd(self, payload):
+        self.queueReaction(payload, True)
+
+    async def onReactionRemove(self, payload):
+        self.queueReaction(payload, False)
+
+    def queueReaction(self, payload, added):
+        if payload.guild_id is None or payload.user_id == self.user.id:
+            return
+
+        # Only buffer reactions on messages that hold a reaction bet.
+        house = self.houses.get(payload.guild_id, None)
+        if house is None or house.getBetByMessage(payload.message_id) is None:
+            return
+
+        key = (payload.guild_id, payload.channel_id, payload.message_id)
+        self.reactions.push(key, (payload.user_id, str(payload.emoji), added))
+
+    async def applyReactions(self, key, events):
+        guild_id, channel_id, message_id = key
+
+        # The bet may have been settled while the reactions were buffered.
+        house = self.houses.get(guild_id, None)
+        bet = house.getBetByMessage(message_id) if house else None
+        if bet is None:
+            return
+
+        started = time.perf_counter()
+        failed = bet.applyReactions([ (house.getPlayer(uid), emoji, added)
+                for uid, emoji, added in events ])
+
+        # Reactions go in the trace as a pseudo-command of their own.
+        if self.tracer is not None:
+            self.tracer.record("react", guild_id, None, channel_id,
+                    [bet.id, [ [self.tracer.anonymize("player", uid), emoji,
+                        added] for uid, emoji, added in events ]],
+                    elapsed=time.perf_counter() - started, ok=not failed)
+        for player, e in failed:
+            logger.info("reaction wager by {} failed; {}".format(player.id, e))
+
+        self.replicate()
+
+        channel = self.get_channel(channel_id)
+        if channel is not None:
+            await channel.get_partial_message(message_id).edit(
+                    embed=_betEmbed(bet))
+
     def getHouse(self, guild) -> House:
-        return self.houses.setdefault(guild.id, House(guild.id))
+        house = self.houses.get(guild.id, None)
+        if house is None:
+            house = self.adoptHouse(House(guild.id))
+
+        return house
+
+    def adoptHouse(self, house) -> House:
+        self.houses[house.id] = house
+        house.ledger = self.ledger
+        if self.replica is not None:
+            self.replica.attach(house)
+
+        return house
+
+    def traceCommand(self, ctx):
+        if self.tracer is None or not hasattr(ctx, "trace_start"):
+            return
+
+        house = ctx.house
+        self.tracer.record(ctx.command.name, house.id, ctx.author.id,
+                ctx.channel.id, ctx.args[1:], kwargs=ctx.kwargs,
+                elapsed=time.perf_counter() - ctx.trace_start,
+                ok=not ctx.command_failed,
+                bet=encodeBetId(house.bet_counter)
+                    if house.bet_counter != ctx.trace_bets else None)
+
+    # Ships whatever changed to the replica. Called whenever the bot is done
+    # changing things for a while, like at the end of every command.
+    def replicate(self):
+        if self.replica is not None:
+            self.replica.flush(self.houses)
 
 @Gooble.command(help="Lists all of the available games.")
 async def games(ctx):
-    embed = discord.Embed(
-        title="Available Games",
-        description="This bot currently supports the following games:",
-        color=DEFAULT_COLOR
-    )
-
-    for game, _ in _BETS_BY_TYPE.values():
-        embed.add_field(
-            name=game.FRIENDLY_NAME,
-            value=game.FRIENDLY_DESCRIPTION,
-            inline=False
+    # The list of games never changes while the bot is running.
+    key = (None, "games")
+    embed = ctx.bot.embeds.get(key, None)
+    if embed is None:
+        embed = discord.Embed(
+            title="Available Games",
+            description="This bot currently supports the following games:",
+            color=DEFAULT_COLOR
         )
 
+        for game, _ in _BETS_BY_TYPE.values():
+            embed.add_field(
+                name=game.FRIENDLY_NAME,
+                value=game.FRIENDLY_DESCRIPTION,
+                inline=False
+            )
+
+        ctx.bot.embeds.put(key, None, embed)
+
     await ctx.send(embed=embed)
 
 @Gooble.command(help="Give a player some funds! 💰")
-async def gift(ctx, recipient: commands.MemberConverter, amount: int):
+async def gift(ctx, recipient: Mention, amount: int):
     house = ctx.house
 
     if recipient is None:
@@ -169,7 +401,7 @@ async def gift(ctx, recipient: commands.MemberConverter, amount: int):
 
     targetPlayer = house.getPlayer(recipient.id)
 
-    targetPlayer.grant(amount)
+    targetPlayer.grant(amount, EntryTypes.GIFT)
     
     embed = discord.Embed(
         title="💰 Payday Is Here! 💰",
@@ -186,14 +418,14 @@ async def gift(ctx, recipient: commands.MemberConverter, amount: int):
 
     await ctx.send(embed=embed)
 
-@Gooble.command(help="Give all players some funds! 💰")
+@Gooble.command(help="Give all players some funds! 💰", cost=EXPENSIVE)
 async def giftall(ctx, amount: int):
     house = ctx.house
 
     # For all known players, grant them the specified amount.
     # TODO: gift to all players in server?
     for player in house.players.values():
-        player.grant(amount)
+        player.grant(amount, EntryTypes.GIFT)
 
     embed = discord.Embed(
         title="💰 Payday Is Here! 💰",
@@ -204,15 +436,7 @@ async def giftall(ctx, amount: int):
 
     await ctx.send(embed=embed)
 
-@Gooble.command(help="Start a new bet")
-async def bet(ctx, game, statement, timeout: int = None, min_bet: int = None):
-    self = ctx.bot
-
-    bet = ctx.house.newBet(
-        game, statement,
-        timeout=timeout, min_bet=min_bet
-    )
-
+def _betEmbed(bet):
     embed = discord.Embed(
             title=bet.FRIENDLY_NAME,
             description=bet.statement,
@@ -226,21 +450,107 @@ async def bet(ctx, game, statement, timeout: int = None, min_bet: int = None):
     if bet.min_bet > 0:
         embed.add_field(name="Minimum Bet", value=str(bet.min_bet))
 
+    if bet.NAMED_OUTCOMES:
+        embed.add_field(
+            name="Outcomes",
+            value="\n".join([ "{}. {}".format(i, outcome)
+                for i, outcome in enumerate(bet.outcomes, 1) ]),
+            inline=False
+        )
+
+    if bet.fixed_stake > 0:
+        embed.add_field(name="Stake", value=str(bet.fixed_stake))
+        embed.add_field(
+            name="Players",
+            value="{} {}  {} {}".format(
+                bet.TRUTHY_EMOJI, len(bet.truthy),
+                bet.FALSEY_EMOJI, len(bet.falsey)),
+            inline=False
+        )
+
+    return embed
+
+@Gooble.command(help="Start a new bet. Parimutuel bets are started with `pool`")
+async def bet(ctx, game, statement, timeout: Optional[int] = None,
+        min_bet: Optional[int] = None):
+    self = ctx.bot
+
+    bet = ctx.house.newBet(
+        game, statement,
+        timeout=timeout, min_bet=min_bet,
+        channel=ctx.channel.id
+    )
+
+    await ctx.send(embed=_betEmbed(bet))
+
+@Gooble.command(help="Start a new parimutuel bet on the given outcomes, " +
+        "e.g. `pool \"Final score?\" 1 2 3`")
+async def pool(ctx, statement, *outcomes):
+    bet = ctx.house.newBet("pm", statement, outcomes=outcomes,
+            channel=ctx.channel.id)
+
+    await ctx.send(embed=_betEmbed(bet))
+
+@Gooble.command(help="Start a new binary bet that players enter by reacting, each with the same stake")
+async def reactbet(ctx, game, statement, stake: int, timeout: int = None):
+    bet = ctx.house.newBet(game, statement, stake=stake, timeout=timeout,
+            channel=ctx.channel.id)
+
+    message = await ctx.send(embed=_betEmbed(bet))
+    ctx.house.bindMessage(bet, message.id)
+
+    await message.add_reaction(bet.TRUTHY_EMOJI)
+    await message.add_reaction(bet.FALSEY_EMOJI)
+
+@Gooble.command(help="Lists the open bets started in this channel. The newest is used when no bet id is given")
+async def bets(ctx):
+    embed = discord.Embed(
+            title="Open Bets in #{}".format(ctx.channel.name),
+            color=DEFAULT_COLOR
+    )
+
+    value = "\n".join([ "`{}` {}: {}".format(bet.id, bet.FRIENDLY_NAME,
+        bet.statement) for bet in reversed(ctx.house.betsIn(ctx.channel.id)) ])
+    embed.add_field(name="Newest First", value=value or "No open bets",
+            inline=False)
+
     await ctx.send(embed=embed)
 
 @Gooble.command(help="Place your stake and wager on a bet")
 async def place(ctx, stake: int, wager, betid=None):
     self = ctx.bot
 
-    bet = ctx.house.getBet(betid)
+    bet = ctx.house.getBet(betid, ctx.channel.id)
 
     bet.addPlayer(ctx.player, stake, wager)
     await ctx.send("{} has placed their wager".format(ctx.author_name))
 
+@Gooble.command(help="Preview what a stake and wager would pay out on a bet")
+async def preview(ctx, stake: int, wager, betid=None):
+    bet = ctx.house.getBet(betid, ctx.channel.id)
+
+    outcomes = bet.preview(ctx.player, stake, wager)
+
+    embed = discord.Embed(
+            title="Payout Preview",
+            description=bet.statement,
+            color=DEFAULT_COLOR
+    )
+
+    value = "\n".join(
+        ["{0}: {1:+}".format(outcome, delta) for outcome, delta in outcomes])
+    embed.add_field(
+        name="{} on \"{}\"".format(stake, wager),
+        value=value,
+        inline=False
+    )
+
+    await ctx.send(embed=embed)
+
 @Gooble.command(help="Cancels a bet, refunding all stakes placed on the bet.")
 async def cancel(ctx, betid=None):
 
-    bet, deltas = ctx.house.cancelBet(betid)
+    bet, deltas = ctx.house.cancelBet(betid, ctx.channel.id)
 
     embed = discord.Embed(
         title="Bet Canceled",
@@ -255,44 +565,101 @@ async def cancel(ctx, betid=None):
 
     await ctx.send(embed=embed)
 
-@Gooble.command(help="List balances for all registered players")
-async def stat(ctx, member: commands.MemberConverter = None):
+@Gooble.command(help="List balances for all registered players",
+        cost=EXPENSIVE)
+async def stat(ctx, member: Mention = None):
     self = ctx.bot
 
     if member:
         player = ctx.house.getPlayer(member.id)
-        embed = discord.Embed(
-                title="Player {}".format(ctx.memberName(member)),
-                color=DEFAULT_COLOR
-        )
 
-        embed.add_field(name="Balance", value=player.balance, inline=False)
-        embed.add_field(name="Wins", value=player.wins, inline=True)
-        embed.add_field(name="Losses", value=player.losses, inline=True)
-        embed.add_field(name="Win Rate", value=str(player.win_rate) + "%", inline=True)
+        key = (ctx.house.id, "stat", member.id)
+        tag = (player.version, ctx.memberName(member))
+        embed = ctx.bot.embeds.get(key, tag)
+        if embed is None:
+            embed = discord.Embed(
+                    title="Player {}".format(ctx.memberName(member)),
+                    color=DEFAULT_COLOR
+            )
+
+            embed.add_field(name="Balance", value=player.balance, inline=False)
+            embed.add_field(name="Wins", value=player.wins, inline=True)
+            embed.add_field(name="Losses", value=player.losses, inline=True)
+            embed.add_field(name="Win Rate", value=str(player.win_rate) + "%", inline=True)
+
+            ctx.bot.embeds.put(key, tag, embed)
 
     else:
-        embed = discord.Embed(
-                title="Current Balances",
-                color=DEFAULT_COLOR
-        )
+        key = (ctx.house.id, "stat", None)
+        version = (ctx.house.version, ctx.names_epoch)
+        embed = ctx.bot.embeds.get(key, version)
+        if embed is None:
+            embed = discord.Embed(
+                    title="Current Balances",
+                    color=DEFAULT_COLOR
+            )
+
+            value = "\n".join(
+                ["{}, {}".format(await ctx.playerName(p), p.balance) \
+                        for p in ctx.house.players.values()])
+            embed.add_field(
+                name="Player Balances",
+                value=value or "No players",
+                inline=False
+            )
+
+            # Add the community pool for the House.
+            embed.add_field(
+                name="House Community Pool",
+                value=ctx.house.community_pool,
+                inline=False
+            )
+
+            if not ctx.unnamed:
+                ctx.bot.embeds.put(key, version, embed)
 
-        value = "\n".join(
-            ["{}, {}".format(await ctx.playerName(p), p.balance) \
-                    for p in ctx.house.players.values()])
-        embed.add_field(
-            name="Player Balances",
-            value=value or "No players",
-            inline=False
-        )
+    await ctx.send(embed=embed)
+
+@Gooble.command(help="Shows a player's balance trend over the last few days and their recent results")
+async def history(ctx, member: Mention = None, days: int = 30):
+    player = ctx.house.getPlayer(member.id) if member else ctx.player
+    name = ctx.memberName(member) if member else ctx.author_name
+
+    embed = discord.Embed(
+            title="History for {}".format(name),
+            color=DEFAULT_COLOR
+    )
+
+    past = player.history
+    if past is None or not len(past):
+        embed.description = "No bets settled yet"
+        await ctx.send(embed=embed)
+        return
 
-        # Add the community pool for the House.
+    samples = past.balancesSince(time.time() - days * 24 * 60 * 60)
+    if samples:
+        balances = [ balance for _, balance in samples ]
         embed.add_field(
-            name="House Community Pool",
-            value=ctx.house.community_pool,
+            name="Balance, Last {} Days".format(days),
+            value="`{}`\n{} to {} ({:+})".format(sparkline(balances),
+                balances[0], balances[-1], balances[-1] - balances[0]),
             inline=False
         )
 
+    recent = past.recent(20)
+    embed.add_field(
+        name="Last {} Results".format(len(recent)),
+        value="`{}`".format("".join("W" if won else "L" for won in recent)),
+        inline=False
+    )
+
+    won, length = past.streak()
+    embed.add_field(name="Streak", value="{} {}".format(length,
+        ("win" if won else "loss") if length == 1 else
+        ("wins" if won else "losses")))
+    embed.add_field(name="Recent Win Rate",
+            value="{:.0f}%".format(100 * sum(recent) / len(recent)))
+
     await ctx.send(embed=embed)
 
 @Gooble.command(help="Display details about the current state of a bet")
@@ -302,30 +669,46 @@ async def details(ctx, betid=None):
     # Get the House for guild in which the command was sent.
     house = ctx.house
     # Get the Bet specified in the command.
-    bet = house.getBet(betid)
+    bet = house.getBet(betid, ctx.channel.id)
 
-    # Get a list of stakes for the bet.
-    stakes = bet.getStakes()
+    key = (house.id, "details", bet.id)
+    version = (bet.version, ctx.names_epoch)
+    embed = ctx.bot.embeds.get(key, version)
+    if embed is None:
+        # Get a list of stakes for the bet.
+        stakes = bet.getStakes()
 
-    embed = discord.Embed(
-        title="",
-        description=bet.statement,
-    )
+        embed = discord.Embed(
+            title="",
+            description=bet.statement,
+        )
 
-    # Serialize the stake tuples for use in the embed.
-    serial_stakes = "\n".join([
-        "{0} : {1} on \"{2}\"".format(await ctx.playerName(player), stake, wager)
-            for player, stake, wager in stakes
-    ])
+        # Serialize the stake tuples for use in the embed.
+        serial_stakes = "\n".join([
+            "{0} : {1} on \"{2}\"".format(await ctx.playerName(player), stake, wager)
+                for player, stake, wager in stakes
+        ])
+
+        embed.add_field(name="Stakes", value=serial_stakes or "No Stakes!")
+
+        if bet.NAMED_OUTCOMES:
+            embed.add_field(
+                name="Odds",
+                value="\n".join([ "{}: {} staked, {}".format(outcome, staked,
+                    "pays {:.2f}x".format(ratio) if ratio else "no picks")
+                    for outcome, staked, ratio in bet.odds() ]),
+                inline=False
+            )
+        if not ctx.unnamed:
+            ctx.bot.embeds.put(key, version, embed)
 
-    embed.add_field(name="Stakes", value=serial_stakes or "No Stakes!")
     await ctx.send(embed=embed)
 
 @Gooble.command(help="End a gamble")
 async def payout(ctx, result, betid=None):
     self = ctx.bot
 
-    bet, deltas = ctx.house.endBet(betid, result)
+    bet, deltas = ctx.house.endBet(betid, result, ctx.channel.id)
 
     embed = discord.Embed(
             title="Bet Results",
@@ -336,6 +719,10 @@ async def payout(ctx, result, betid=None):
     value = "\n".join(
         ["{0}, {1:+} ({2})".format(await ctx.playerName(p), d, p.balance) \
                 for p, d in deltas])
+    if bet.losers:
+        # Losing pools aren't listed, however many players are in them.
+        value = "\n".join(filter(None, [value,
+                "Everyone else lost their stake"]))
     embed.add_field(name="Type", value=bet.FRIENDLY_NAME)
     embed.add_field(name="Unique Identifier", value=bet.id)
     embed.add_field(name="Results", value=value or "No Bets Placed",
@@ -343,8 +730,37 @@ async def payout(ctx, result, betid=None):
 
     await ctx.send(embed=embed)
 
+@Gooble.command(help="Settle several bets at once, e.g. `settle <betid> <result> <betid> <result>`",
+        cost=EXPENSIVE)
+async def settle(ctx, *pairs):
+    if not pairs or len(pairs) % 2:
+        raise HouseException("please give a result for every bet id")
+
+    bets, summary = ctx.house.endBets(zip(pairs[0::2], pairs[1::2]))
+
+    embed = discord.Embed(
+            title="Bet Results",
+            description="{} bets settled".format(len(bets)),
+            color=DEFAULT_COLOR
+    )
+
+    embed.add_field(
+        name="Bets",
+        value="\n".join(
+            ["`{}` {}".format(bet.id, bet.statement) for bet in bets]),
+        inline=False
+    )
+
+    value = "\n".join(
+        ["{0}, {1:+} ({2})".format(await ctx.playerName(p), d, p.balance) \
+                for p, d in summary])
+    embed.add_field(name="Net Results", value=value or "No Bets Placed",
+            inline=False)
+
+    await ctx.send(embed=embed)
+
 @Gooble.command(help="Transfer funds to another player or make a donation to the House.")
-async def transfer(ctx, amount: int, recipient: commands.MemberConverter=None):
+async def transfer(ctx, amount: int, recipient: Mention=None):
     house = ctx.house
     player = ctx.player
 
@@ -373,31 +789,183 @@ async def transfer(ctx, amount: int, recipient: commands.MemberConverter=None):
 
     await ctx.send(embed=embed)
 
+@Gooble.command(help="Lists a player's most recent transactions, up to {}"
+        .format(Gooble.MAX_TRANSACTIONS))
+async def transactions(ctx, member: Mention = None,
+        count: int = 10):
+    player = ctx.house.getPlayer(member.id) if member else ctx.player
+    name = ctx.memberName(member) if member else ctx.author_name
+
+    entries = ctx.bot.ledger.last(ctx.house.id, player.id,
+            min(count, ctx.bot.MAX_TRANSACTIONS))
+
+    embed = discord.Embed(
+            title="Transactions for {}".format(name),
+            color=DEFAULT_COLOR
+    )
+
+    lines = [ "`{:%Y-%m-%d %H:%M}` {} {:+} ({}){}".format(
+            entry.time, entry.type.name.replace("_", " ").title(),
+            entry.amount, entry.balance,
+            " on {}".format(entry.bet) if entry.bet else "")
+            for entry in entries ]
+    for i, value in enumerate(fieldValues(lines) or ["No Transactions"]):
+        embed.add_field(name="Newest First" if i == 0 else "\u200b",
+                value=value, inline=False)
+
+    await ctx.send(embed=embed)
+
 @Gooble.command(
     help="Displays a leaderboard. Available leaderboards are {}".format(
         ", ".join([ e.name.replace("_", " ") for e in LeaderboardTypes ])
-    )
+    ),
+    cost=EXPENSIVE
 )
 async def leaderboard(ctx, *, type: str):
     
     leaderboard_type = LeaderboardTypes[type.upper().replace(" ", "_")]
-    leaderboard_items = ctx.house.getLeaderboard(leaderboard_type)
 
-    embed = discord.Embed(
-        title="{} Leaderboard".format(
-            leaderboard_type.name.replace("_", " ").title()
+    key = (ctx.house.id, "leaderboard", leaderboard_type)
+    version = (ctx.house.version, ctx.names_epoch)
+    embed = ctx.bot.embeds.get(key, version)
+    if embed is None:
+        leaderboard_items = ctx.house.getLeaderboard(leaderboard_type)
+
+        embed = discord.Embed(
+            title="{} Leaderboard".format(
+                leaderboard_type.name.replace("_", " ").title()
+            )
         )
-    )
 
-    leaderboard_list = "\n".join(
-        [ "`{:<20} {:>4}`".format(await ctx.playerName(player), value)
-            for player, value in leaderboard_items ]
+        leaderboard_list = "\n".join(
+            [ "`{:<20} {:>4}`".format(await ctx.playerName(player), value)
+                for player, value in leaderboard_items ]
+        )
+
+        embed.add_field(
+            name="Top Players",
+            value=leaderboard_list,
+            inline=False
+        )
+
+        if not ctx.unnamed:
+            ctx.bot.embeds.put(key, version, embed)
+
+    await ctx.send(embed=embed)
+
+@Gooble.command(
+    help="Ends the current season and starts a new one. Open bets are " +
+        "canceled and every player starts over with a fresh balance",
+    cost=EXPENSIVE
+)
+@commands.has_guild_permissions(manage_guild=True)
+async def newseason(ctx):
+    season = ctx.house.newSeason()
+
+    embed = discord.Embed(
+        title="Season {} Is Over".format(season.number),
+        description="Season {} has begun! {}".format(
+            ctx.house.season, choice(CELEBRATORY_MSGS)),
+        color=DEFAULT_COLOR
     )
 
+    top = season.getLeaderboard(LeaderboardTypes.MONEY, 4)
     embed.add_field(
-        name="Top Players",
-        value=leaderboard_list,
+        name="Final Standings",
+        value="\n".join([ "{}, {}".format(await ctx.playerName(player), value)
+            for player, value in top ]) or "No players",
         inline=False
     )
 
-    await ctx.send(embed=embed)
\ No newline at end of file
+    await ctx.send(embed=embed)
+
+@Gooble.command(
+    help="Displays a leaderboard from a past season, e.g. " +
+        "`season 2 win rate`. Shows balances by default"
+)
+async def season(ctx, number: int, *, type: str = "money"):
+    past = ctx.house.getSeason(number)
+    leaderboard_type = LeaderboardTypes[type.upper().replace(" ", "_")]
+
+    # Past seasons never change, so their leaderboards only go stale when
+    # players are renamed.
+    key = (ctx.house.id, "season", number, leaderboard_type)
+    embed = ctx.bot.embeds.get(key, ctx.names_epoch)
+    if embed is None:
+        embed = discord.Embed(
+            title="Season {} {} Leaderboard".format(number,
+                leaderboard_type.name.replace("_", " ").title()),
+            description="{:%Y-%m-%d} to {:%Y-%m-%d}".format(
+                past.start_time, past.end_time),
+            color=DEFAULT_COLOR
+        )
+
+        leaderboard_list = "\n".join(
+            [ "`{:<20} {:>4}`".format(await ctx.playerName(player), value)
+                for player, value in past.getLeaderboard(leaderboard_type) ]
+        )
+
+        embed.add_field(
+            name="Top Players",
+            value=leaderboard_list or "No players",
+            inline=False
+        )
+        embed.add_field(name="Players", value=len(past))
+        embed.add_field(name="House Community Pool",
+                value=past.community_pool)
+
+        if not ctx.unnamed:
+            ctx.bot.embeds.put(key, ctx.names_epoch, embed)
+
+    await ctx.send(embed=embed)
+
+@Gooble.command(hidden=True, help="Shows how well the embed cache is doing")
+async def cachestats(ctx):
+    embeds = ctx.bot.embeds
+
+    embed = discord.Embed(title="Embed Cache", color=DEFAULT_COLOR)
+    embed.add_field(name="Entries", value=len(embeds))
+    embed.add_field(name="Hit Rate", value="{:.1f}%".format(embeds.hit_rate))
+    embed.add_field(name="Hits", value=embeds.hits)
+    embed.add_field(name="Misses", value=embeds.misses)
+    embed.add_field(name="Evictions", value=embeds.evictions)
+
+    await ctx.send(embed=embed)
+
+@Gooble.command(hidden=True, help="Shows how far behind the replica is")
+async def replica(ctx):
+    replica = ctx.bot.replica
+    if replica is None:
+        await ctx.send("No replica is configured")
+        return
+
+    embed = discord.Embed(title="Replica", color=DEFAULT_COLOR)
+    embed.add_field(name="Address", value=str(replica.address))
+    embed.add_field(name="Connected", value="yes" if replica.connected else "no")
+    embed.add_field(name="Messages Behind", value=replica.lag)
+    embed.add_field(name="Last Round Trip", value="{:.1f}ms".format(
+        replica.ack_delay * 1000) if replica.ack_delay is not None else "n/a")
+    embed.add_field(name="Mismatches Found", value=replica.mismatches)
+
+    await ctx.send(embed=embed)
+
+@Gooble.command(
+    help="Sets how many commands per second (rate) and in a burst each " +
+        "player and the whole server may use. Bursts must be at least {}"
+        .format(EXPENSIVE),
+    # Never limited, so bad limits can always be fixed.
+    cost=None
+)
+@commands.has_guild_permissions(manage_guild=True)
+async def ratelimit(ctx, player_rate: float, player_burst: int,
+        house_rate: float, house_burst: int):
+    try:
+        ctx.house.limiter.configure(
+            player_rate=player_rate, player_burst=player_burst,
+            house_rate=house_rate, house_burst=house_burst
+        )
+    except ValueError as e:
+        raise commands.BadArgument(str(e)) from e
+    ctx.house.touch()
+
+    await ctx.send("Rate limits updated")
@@ -0,0 +1,102 @@
+import struct
+import time
+
+from .util import BitRing, RingBuffer
+
+class PlayerHistory:
+    '''
+    A player's most recent settled bets: when each one settled, the balance
+    right after it and whether it was a win. Everything lives in fixed-size
+    rings, so recording a result is O(1) and the history never grows past
+    a couple of kilobytes.
+    '''
+    CAPACITY = 128
+
+    # Format version, capacity and number of samples.
+    HEADER = struct.Struct("<BHH")
+    FORMAT = 1
+
+    def __init__(self, /, capacity=CAPACITY):
+        self.times = RingBuffer("d", capacity)
+        self.balances = RingBuffer("q", capacity)
+        self.outcomes = BitRing(capacity)
+
+    @property
+    def capacity(self):
+        return self.times.capacity
+
+    def __len__(self):
+        return len(self.times)
+
+    def record(self, won, balance, /, when=None):
+        self.times.append(time.time() if when is None else when)
+        self.balances.append(balance)
+        self.outcomes.append(won)
+
+    '''
+    Returns the (time, balance) samples taken at or after the given time,
+    oldest first.
+    '''
+    def balancesSince(self, when):
+        samples = list(zip(self.times, self.balances))
+
+        # Samples are in time order, so the wanted ones are at the end.
+        i = len(samples)
+        while i and samples[i - 1][0] >= when:
+            i -= 1
+
+        return samples[i:]
+
+    '''
+    Returns the outcomes of the last n settled bets, oldest first.
+    '''
+    def recent(self, n):
+        return list(self.outcomes)[-n:] if n else []
+
+    def streak(self):
+        return self.outcomes.streak()
+
+    def tobytes(self) -> bytes:
+        count = len(self)
+        return b"".join([
+            self.HEADER.pack(self.FORMAT, self.capacity, count),
+            self.times.tobytes(),
+            self.balances.tobytes(),
+            self.outcomes.bits.to_bytes((count + 7) // 8, "little")
+        ])
+
+    @classmethod
+    def frombytes(cls, data, /, capacity=CAPACITY):
+        fmt, _, count = cls.HEADER.unpack_from(data)
+        if fmt != cls.FORMAT:
+            raise ValueError("unknown history format {}".format(fmt))
+
+        offset = cls.HEADER.size
+        times = data[offset:offset + count * 8]
+        offset += count * 8
+        balances = data[offset:offset + count * 8]
+        offset += count * 8
+        bits = int.from_bytes(data[offset:offset + (count + 7) // 8], "little")
+
+        self = cls(capacity=capacity)
+        self.times = RingBuffer.frombytes("d", capacity, times)
+        self.balances = RingBuffer.frombytes("q", capacity, balances)
+        for i in reversed(range(min(count, capacity))):
+            self.outcomes.append((bits >> i) & 1)
+
+        return self
+
+_SPARKS = "▁▂▃▄▅▆▇█"
+
+'''
+Draws a series of numbers as a line of block characters.
+'''
+def sparkline(values):
+    values = list(values)
+    if not values:
+        return ""
+
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return "".join(_SPARKS[(value - low) * (len(_SPARKS) - 1) // span]
+            for value in values)
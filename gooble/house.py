@@ -1,8 +1,18 @@
+import time
+import weakref
+from bisect import bisect_left, insort
 from typing import Iterable, Tuple
-import discord
 
-from .player import LeaderboardTypes, Player
-from .bet import Bet
+from .audit import MoneyTracker
+from .ledger import EntryTypes, HOUSE_ACCOUNT
+from .limits import RateLimiter
+from .player import LeaderboardTypes, Player, rankPlayers
+from .bet import Bet, encodeBetId
+from .season import Season
+from .util import nextVersion
+
+from .logs import getLogger
+logger = getLogger()
 
 DEFAULT_STARTING_AMOUNT = 1000
 
@@ -16,69 +26,343 @@ class House:
         self.players = {}
         self.bets = {}
 
+        # Virtual players that are still in use somewhere; see getPlayer().
+        self._virtual = weakref.WeakValueDictionary()
+
+        # The ids of open bets in sorted order, for lookups by prefix.
+        self._bet_ids = []
+
+        # The number of bets ever started in the house; new bets take their
+        # id from it.
+        self.bet_counter = 0
+
+        # Players who left the guild, kept in case they come back.
+        self.archived = {}
+
+        # The losing pools of settled bets whose players haven't had the loss
+        # counted yet, with when each bet settled; see applyLosses().
+        self._losses = []
+
         self.community_pool = 0
 
-        self.running: Bet = None
+        # Maps a channel id to the ids of the open bets started there, oldest
+        # first, as the keys of a dict. The newest is the channel's default
+        # bet. Bets started outside of any channel are under None.
+        self.channels = {}
+
+        # Maps the id of a message a reaction bet was posted in to the bet.
+        self.messages = {}
+
+        # An optional Ledger that every change to a balance is appended to.
+        self.ledger = None
+
+        # Running totals used to check that no money is created or destroyed.
+        self.tracker = MoneyTracker()
+
+        # Changes whenever anything in the house changes, and starts out
+        # unlike any other house's so a replacement never matches the cache.
+        self.version = nextVersion()
+
+        self.limiter = RateLimiter()
+
+        # An optional journal told about every change, for replication.
+        self.journal = None
+
+        # The current season and when it started, and snapshots of the
+        # seasons before it, oldest first.
+        self.season = 1
+        self.season_started = time.time()
+        self.seasons = []
 
     @property
     def running(self) -> Bet:
-        return self.bets.get(self._running_id, None)
+        return self.runningIn(None)
+
+    '''
+    Returns the newest open bet started in the given channel, or None.
+    '''
+    def runningIn(self, channel) -> Bet:
+        betids = self.channels.get(channel, None)
+        return self.bets[next(reversed(betids))] if betids else None
+
+    '''
+    Returns the open bets started in the given channel, oldest first.
+    '''
+    def betsIn(self, channel) -> Iterable[Bet]:
+        return [ self.bets[betid] for betid in self.channels.get(channel, ()) ]
+
+    '''
+    Returns the player with the given id. Someone the House hasn't seen do
+    anything yet gets a virtual player with the default balance, which is
+    only stored once something about it changes (see materialize()).
+    Returning players and players given a balance of their own are stored
+    right away.
+    '''
+    def getPlayer(self, pid, /, balance=DEFAULT_STARTING_AMOUNT):
+        self.applyLosses()
 
-    @running.setter
-    def running(self, bet: Bet):
-        self._running_id = bet.id if bet else None
+        player = self.players.get(pid, None)
+        if player is not None:
+            return player
 
-    @running.deleter
-    def running(self):
-        self._running_id = None
+        archived = self.archived.pop(pid, None)
+        if archived is not None:
+            return self.materialize(Player.fromJSON(archived))
+        if balance != DEFAULT_STARTING_AMOUNT:
+            return self.materialize(Player(pid, balance))
 
-    def getPlayer(self, pid, /, balance=DEFAULT_STARTING_AMOUNT):
-        player = self.players.setdefault(pid,
-                Player(pid, balance))
+        # Hand out the same stand-in for as long as anything holds on to it.
+        player = self._virtual.get(pid, None)
+        if player is None:
+            player = self._virtual[pid] = Player(pid, balance)
+            player.house = self
+            player.virtual = True
+
+        return player
+
+    '''
+    Stores a player in the House. Virtual players call this themselves right
+    before their first change.
+    '''
+    def materialize(self, player) -> Player:
+        player.virtual = False
+        self._virtual.pop(player.id, None)
+
+        self.players[player.id] = player
+        player.house = self
+        self.tracker.open(player)
+        self.touch(player)
 
         return player
 
-    def getBet(self, betid):
-        bet = self.bets.get(betid, self.running)
+    '''
+    Counts the losses owed from settled bets. Bets that hand over their
+    losing pools have them counted here instead of while settling, so
+    settling only costs as much as there are winners. Anything that changes
+    a player or reads the House's players calls this first, so nobody sees
+    a count or balance that's out of step.
+    '''
+    def applyLosses(self):
+        while self._losses:
+            pending, self._losses = self._losses, []
+            for when, pools in pending:
+                for pool in pools:
+                    for player, _ in pool.values():
+                        if self.owns(player):
+                            player.add_loss(when=when)
+
+    '''
+    Whether the player is the one the House holds for their id. Players left
+    behind by a new season or archiving aren't, and can no longer change.
+    '''
+    def owns(self, player) -> bool:
+        home = self._virtual if player.virtual else self.players
+        return home.get(player.id, None) is player
+
+    '''
+    Marks the House as changed, along with any players or bets given (or
+    the whole House, if given itself).
+    '''
+    def touch(self, *changed):
+        self.version = nextVersion()
+        if self.journal is not None:
+            self.journal.mark(self, changed)
+
+    '''
+    Called for every change to a player's balance, or to the community pool
+    when no player is given.
+    '''
+    def record(self, player, entry: EntryTypes, amount, bet=None):
+        self.tracker.apply(player, entry, amount, bet)
+
+        # Every change to a bet's stakes moves money, so this is where bets
+        # pick up new versions too.
+        self.touch(player, bet)
+        if bet is not None:
+            bet.version = nextVersion()
+
+        if self.ledger is not None:
+            if player is None:
+                self.ledger.append(entry, self.id, HOUSE_ACCOUNT, amount,
+                        self.community_pool, bet)
+            else:
+                self.ledger.append(entry, self.id, player.id, amount,
+                        player.balance, bet)
+
+        # Transfers come in pairs, so they're checked once both sides land.
+        if entry is not EntryTypes.TRANSFER:
+            self.verify()
+
+    def verify(self) -> bool:
+        return self.tracker.check(self.community_pool)
+
+    '''
+    Recomputes the House's totals from scratch and checks them against the
+    running totals. This is a full scan; verify() is the cheap check.
+    '''
+    def audit(self) -> bool:
+        balances = sum(player.balance for player in self.players.values())
+        escrowed = sum(stake for bet in self.bets.values()
+                for _, stake, *_ in bet.getStakes())
+
+        return self.tracker.audit(balances, escrowed, self.community_pool)
+
+    '''
+    Archives the given players and refunds any stakes they have on open bets.
+    An archived player is restored the next time they're looked up.
+    '''
+    def removePlayers(self, pids) -> Iterable[Player]:
+        self.applyLosses()
+
+        departed = [ self.players[pid] for pid in pids if pid in self.players ]
+        if not departed:
+            return departed
+
+        for bet in list(self.bets.values()):
+            for player in departed:
+                bet.refundPlayer(player)
+
+        for player in departed:
+            self.tracker.retire(player)
+            self.archived[player.id] = player.json
+            del self.players[player.id]
+
+        self.touch(*departed)
+        return departed
+
+    '''
+    Looks up a bet by id, or falls back to the newest bet in the channel.
+    '''
+    def getBet(self, betid, /, channel=None):
+        bet = self.findBet(betid) if betid else self.runningIn(channel)
         if not bet:
             raise HouseException("please specify a valid id or start a new bet")
 
         return bet
 
-    def cancelBet(self, betid):
-        bet = self.bets.get(betid, self.running)
-        if not bet:
-            raise HouseException("please specify a valid id or start a new bet")
-        
-        deltas = bet.cancel()
+    '''
+    Looks up an open bet by its id or by any prefix of an id that only one
+    open bet starts with. Returns None if no bet matches.
+    '''
+    def findBet(self, betid) -> Bet:
+        betid = betid.lower()
+
+        bet = self.bets.get(betid, None)
+        if bet is not None:
+            return bet
 
-        # If the bet is somewhere in the dictionary, remove it.
-        if bet.id in self.bets:
-            self.bets.pop(bet.id, None)
-        # If the bet is the current running bet, clear the running bet.
-        if bet is self.running:
-            self.running = None
+        # Every id starting with the prefix sorts right after it.
+        i = bisect_left(self._bet_ids, betid)
+        matches = [ candidate for candidate in self._bet_ids[i:i + 2]
+                if candidate.startswith(betid) ]
+
+        if len(matches) > 1:
+            raise HouseException(
+                    "'{}' matches more than one bet; use more of the id"
+                    .format(betid))
+
+        return self.bets[matches[0]] if matches else None
+
+    def getBetByMessage(self, mid):
+        betid = self.messages.get(mid, None)
+        return self.bets.get(betid, None) if betid else None
+
+    def bindMessage(self, bet, mid):
+        bet.message = mid
+        self.messages[mid] = bet.id
+        self.touch(bet)
+
+    def cancelBet(self, betid, /, channel=None):
+        bet = self.getBet(betid, channel)
+
+        deltas = bet.cancel()
+        self.tracker.close(bet)
+        self._dropBet(bet)
 
         return bet, deltas
 
-    def endBet(self, betid, result):
-        bet = self.getBet(betid)
+    def endBet(self, betid, result, /, channel=None):
+        bet = self.getBet(betid, channel)
         if not bet:
             return None
 
         deltas, house_take = bet.end(result)
+        self._closeBet(bet, house_take)
+
+        return bet, deltas
+
+    '''
+    Settles several bets in one pass, given an iterable of (bet id, result)
+    pairs. Every pair is validated before any bet is settled. Returns the
+    settled bets and the net delta for each player across all of them.
+    '''
+    def endBets(self, results: Iterable[Tuple[str, str]]):
+        pending = []
+        for betid, result in results:
+            bet = self.findBet(betid)
+            if not bet:
+                raise HouseException("'{}' is not a valid bet id".format(betid))
+
+            if any(bet is other for other, _ in pending):
+                raise HouseException(
+                        "bet {} was given more than once".format(bet.id))
+
+            # Raises if the result doesn't make sense for this bet.
+            bet.parseResult(result)
+            pending.append((bet, result))
+
+        net = {}
+        for bet, result in pending:
+            deltas, house_take = bet.end(result)
+            self._closeBet(bet, house_take)
+
+            for player, delta in deltas:
+                net[player] = net.get(player, 0) + delta
+
+        summary = list(net.items())
+        Bet.sortDeltas(summary)
+        return [ bet for bet, _ in pending ], summary
+
+    def _closeBet(self, bet, house_take):
+        if bet.losers:
+            self._losses.append((time.time(), bet.losers))
 
         # If the house had any take, add it to the community pool.
-        self.community_pool += house_take
+        if house_take:
+            self.community_pool += house_take
+            self.record(None, EntryTypes.HOUSE_TAKE, house_take, bet)
 
-        self.running = None
-        return bet, deltas
+        self.tracker.close(bet)
+
+        # A settled bet can't be paid out again.
+        self._dropBet(bet)
+
+    def _dropBet(self, bet):
+        self.bets.pop(bet.id, None)
+        self.messages.pop(bet.message, None)
+
+        i = bisect_left(self._bet_ids, bet.id)
+        if i < len(self._bet_ids) and self._bet_ids[i] == bet.id:
+            del self._bet_ids[i]
+
+        # The channel falls back to its next newest bet, if it has one.
+        betids = self.channels.get(bet.channel, None)
+        if betids is not None:
+            betids.pop(bet.id, None)
+            if not betids:
+                del self.channels[bet.channel]
+
+        self.touch(bet)
 
     def newBet(self, gtnick, statement, **kwargs):
-        bet = Bet.newBet(gtnick, statement, **kwargs)
+        bet = Bet.newBet(gtnick, statement,
+                id=encodeBetId(self.bet_counter + 1), **kwargs)
+        self.bet_counter += 1
 
         self.bets[bet.id] = bet
-        self.running = bet
+        insort(self._bet_ids, bet.id)
+        self.channels.setdefault(bet.channel, {})[bet.id] = None
+        self.touch(bet)
         return bet
 
     def transferFunds(self, sourcePlayer, amount, /, targetPlayer=None):
@@ -87,45 +371,93 @@ class House:
             raise HouseException("Player {} does not have enough funds " + 
                 "for this transfer.".format(sourcePlayer.name))
         
-        sourcePlayer.take(amount)
+        sourcePlayer.take(amount, EntryTypes.TRANSFER)
 
         # If the target player is NoneType, the donation is for the House ;)
         if targetPlayer is None:
             self.community_pool += amount
+            self.record(None, EntryTypes.TRANSFER, amount)
         else:
-            targetPlayer.grant(amount)
+            targetPlayer.grant(amount, EntryTypes.TRANSFER)
 
-    def getLeaderboard(self, type: LeaderboardTypes, limit: int = 10) -> Iterable[Tuple[Player, str]]:
+        self.verify()
+
+    '''
+    Ends the current season and starts the next one. Open bets are canceled
+    and refunded, the players and their standings are kept in a snapshot,
+    and everyone starts over with the default balance and an empty community
+    pool.
+    '''
+    def newSeason(self) -> Season:
+        self.applyLosses()
+
+        for betid in list(self.bets):
+            self.cancelBet(betid)
+
+        # One marker stands for everyone's balance going back to the default;
+        # the ledger reads balances from before it as reset.
+        if self.ledger is not None:
+            self.ledger.append(EntryTypes.SEASON_RESET, self.id, HOUSE_ACCOUNT,
+                    DEFAULT_STARTING_AMOUNT, 0)
+
+        now = time.time()
+        season = Season(self.season, self.season_started, now, self.players,
+                archived=self.archived, community_pool=self.community_pool)
+        self.seasons.append(season)
+
+        self.players = {}
+        self.archived = {}
+        self.community_pool = 0
+        self.tracker = MoneyTracker(strict=self.tracker.strict)
 
-        all_players = list(self.players.values())
-        postfix = ''
+        self.season += 1
+        self.season_started = now
 
-        if type == LeaderboardTypes.WINS:
-            ext_method = lambda x: x.wins
-        elif type == LeaderboardTypes.WIN_RATE:
-            ext_method = lambda x: x.win_rate
-            postfix = '%'
-        elif type == LeaderboardTypes.LOSSES:
-            ext_method = lambda x: x.losses
-        elif type == LeaderboardTypes.LOSS_RATE:
-            ext_method = lambda x: x.loss_rate
-            postfix = '%'
-        elif type == LeaderboardTypes.MONEY:
-            ext_method = lambda x: x.balance
+        # Everything changed at once.
+        self.touch(self)
+        return season
 
-        all_players.sort(key=ext_method, reverse=True)
-        all_players = all_players[0:limit - 1]
+    def getSeason(self, number) -> Season:
+        # Seasons are numbered from 1 and never skipped.
+        if not 1 <= number <= len(self.seasons):
+            raise HouseException("season {} is still going".format(number)
+                    if number == self.season else
+                    "there is no season {}".format(number))
 
-        return [ (player, str(ext_method(player)) + postfix) for player in all_players ]
+        return self.seasons[number - 1]
 
+    def getLeaderboard(self, type: LeaderboardTypes, limit: int = 10) -> Iterable[Tuple[Player, str]]:
+        self.applyLosses()
+        ranked, render = rankPlayers(self.players.values(), type)
+        return [ (player, render(player)) for player in ranked[:limit] ]
+
+    '''
+    Everything in the json besides the players, bets and seasons.
+    '''
     @property
-    def json(self):
+    def meta(self):
         return {
             "id": self.id,
-            "players": list(map(lambda k: k.json, self.players.values())),
-            "community_pool": self.community_pool
+            "community_pool": self.community_pool,
+            "limits": self.limiter.limits,
+            "bet_counter": self.bet_counter,
+            "season": self.season,
+            "season_started": self.season_started
         }
 
+    @property
+    def json(self):
+        self.applyLosses()
+
+        value = self.meta
+        value.update({
+            "players": list(map(lambda k: k.json, self.players.values())),
+            "archived": list(self.archived.values()),
+            "bets": list(map(lambda k: k.json, self.bets.values())),
+            "seasons": list(map(lambda k: k.json, self.seasons))
+        })
+        return value
+
     @classmethod
     def fromJSON(cls, value):
 
@@ -135,11 +467,43 @@ class House:
         self = cls(value["id"])
 
         self.community_pool = value.get("community_pool", 0)
+        self.bet_counter = value.get("bet_counter", 0)
+
+        # Limits saved before they were checked may be unusable.
+        try:
+            self.limiter.configure(**value.get("limits", {}))
+        except ValueError as e:
+            logger.error("ignoring rate limits of house {}; {}".format(
+                    self.id, e))
+
+        self.season = value.get("season", 1)
+        self.season_started = value.get("season_started", self.season_started)
+        self.seasons = list(map(Season.fromJSON, value.get("seasons", [])))
 
         if "players" in value:
             for playerJSON in value["players"]:
                 newPlayer = Player.fromJSON(playerJSON)
+                newPlayer.house = self
                 self.players[newPlayer.id] = newPlayer
+                self.tracker.open(newPlayer)
+
+        for playerJSON in value.get("archived", []):
+            self.archived[playerJSON["id"]] = playerJSON
+
+        # Open bets come back with their stakes still held.
+        for betJSON in value.get("bets", []):
+            bet = Bet.fromJSON(betJSON, self)
+            self.bets[bet.id] = bet
+            insort(self._bet_ids, bet.id)
+            self.channels.setdefault(bet.channel, {})[bet.id] = None
+            if bet.message is not None:
+                self.messages[bet.message] = bet.id
+
+            for _, stake, *_ in bet.getStakes():
+                self.tracker.restore(bet, stake)
+
+        # Whatever is already in the pool counts towards the money supply.
+        self.tracker.supply += self.community_pool
     
         return self
             
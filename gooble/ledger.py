@@ -0,0 +1,289 @@
+import os
+import time
+import struct
+import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+from enum import Enum, auto
+from typing import Iterable, NamedTuple, Optional
+
+from .logs import getLogger
+logger = getLogger()
+
+class LedgerException(Exception):
+    pass
+
+class EntryTypes(Enum):
+    GRANT       = 0
+    TAKE        = auto()
+    TRANSFER    = auto()
+    STAKE       = auto()
+    REFUND      = auto()
+    PAYOUT      = auto()
+    GIFT        = auto()
+    HOUSE_TAKE  = auto()
+
+    # Belongs to the house account and stands for every player's balance going
+    # back to its amount; the community pool goes to 0.
+    SEASON_RESET = auto()
+
+'''
+The player id used for entries that belong to the House itself (the community
+pool) rather than to one of its players.
+'''
+HOUSE_ACCOUNT = 0
+
+# Entries without an associated bet (or game type) store these instead.
+_NO_BET = b""
+_NO_GAME = 0xff
+
+class Entry(NamedTuple):
+    timestamp: float
+    type: EntryTypes
+    house: int
+    player: int
+    bet: Optional[str]
+    game: Optional[int]
+    amount: int
+    balance: int
+
+    @property
+    def time(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.timestamp)
+
+class Ledger:
+    '''
+    Every record has the same width: timestamp, entry type, game type, house
+    id, player id, bet id, signed amount and the balance after the entry.
+    '''
+    RECORD = struct.Struct("<dBBQQ8sqq")
+
+    '''
+    The number of records written to a segment file before starting a new
+    one.
+    '''
+    SEGMENT_RECORDS = 1 << 16
+
+    def __init__(self, path, /, segment_records=SEGMENT_RECORDS):
+        self.path = path
+        self.segment_records = segment_records
+
+        # Maps (house, player) to the sequence numbers and timestamps of that
+        # player's entries, oldest first, and each house to its season resets
+        # the same way.
+        self._index = {}
+        self._seasons = {}
+        self._count = 0
+
+        self._writer = None
+        self._writer_segment = None
+        self._readers = {}
+
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+
+    def _segmentPath(self, segment):
+        return self._pathFor(self.path, segment)
+
+    @staticmethod
+    def _pathFor(path, segment):
+        return os.path.join(path, "{:08d}.seg".format(segment))
+
+    @staticmethod
+    def _segments(path):
+        return sorted(int(name[:-4]) for name in os.listdir(path)
+                if name.endswith(".seg") and name[:-4].isdigit())
+
+    def _load(self):
+        for segment in self._segments(self.path):
+            if segment != self._count // self.segment_records:
+                raise LedgerException(
+                        "ledger segment {} is out of place".format(segment))
+
+            with open(self._segmentPath(segment), "rb") as f:
+                data = f.read()
+
+            # Drop a partially written record left behind by a crash.
+            torn = len(data) % self.RECORD.size
+            if torn:
+                logger.error("truncating torn record in ledger segment {}"
+                        .format(segment))
+                data = data[:-torn]
+                with open(self._segmentPath(segment), "r+b") as f:
+                    f.truncate(len(data))
+
+            for record in self.RECORD.iter_unpack(data):
+                timestamp, entry, _, house, player, *_ = record
+                self._indexEntry(EntryTypes(entry), house, player, timestamp)
+
+        logger.debug("Loaded {} ledger entries".format(self._count))
+
+    def _indexEntry(self, entry, house, player, timestamp):
+        for index, key in ((self._index, (house, player)),
+                (self._seasons, house)):
+            seqs, times = index.setdefault(key, (array("Q"), array("d")))
+            seqs.append(self._count)
+            times.append(timestamp)
+
+            if entry is not EntryTypes.SEASON_RESET:
+                break
+
+        self._count += 1
+
+    def __len__(self):
+        return self._count
+
+    def append(self, entry: EntryTypes, house, player, amount, balance,
+            /, bet=None) -> Entry:
+        segment = self._count // self.segment_records
+        if segment != self._writer_segment:
+            if self._writer:
+                self._writer.close()
+
+            self._writer = open(self._segmentPath(segment), "ab")
+            self._writer_segment = segment
+
+        timestamp = time.time()
+        betid = bet.id.encode() if bet is not None else _NO_BET
+        game = bet.GAME_TYPE.value if bet is not None else _NO_GAME
+
+        self._writer.write(self.RECORD.pack(timestamp, entry.value, game,
+                house, player, betid, amount, balance))
+        self._writer.flush()
+
+        self._indexEntry(entry, house, player, timestamp)
+        return Entry(timestamp, entry, house, player,
+                bet.id if bet is not None else None,
+                game if bet is not None else None, amount, balance)
+
+    def _read(self, seq) -> Entry:
+        segment, offset = divmod(seq, self.segment_records)
+
+        reader = self._readers.get(segment, None)
+        if reader is None:
+            reader = self._readers[segment] = open(
+                    self._segmentPath(segment), "rb", buffering=0)
+
+        reader.seek(offset * self.RECORD.size)
+        return self._unpack(reader.read(self.RECORD.size))
+
+    @classmethod
+    def _unpack(cls, data) -> Entry:
+        return cls._fromRecord(cls.RECORD.unpack(data))
+
+    @staticmethod
+    def _fromRecord(record) -> Entry:
+        timestamp, entry, game, house, player, betid, amount, balance = record
+
+        betid = betid.rstrip(b"\0").decode() or None
+        return Entry(timestamp, EntryTypes(entry), house, player, betid,
+                game if game != _NO_GAME else None, amount, balance)
+
+    '''
+    Streams every entry in the ledger at the given path, oldest first, or
+    just the entries in the given segments. Only a chunk of records is held
+    at a time and no index is built, so this is cheap to run against the
+    ledger of a live bot.
+    '''
+    @classmethod
+    def scan(cls, path, /, chunk_records=4096, segments=None) \
+            -> Iterable[Entry]:
+        size = cls.RECORD.size
+
+        if segments is None:
+            segments = cls._segments(path)
+
+        for segment in segments:
+            with open(cls._pathFor(path, segment), "rb") as f:
+                while True:
+                    data = f.read(chunk_records * size)
+
+                    # Stop short of a record that is still being written.
+                    usable = len(data) - len(data) % size
+                    for record in cls.RECORD.iter_unpack(data[:usable]):
+                        yield cls._fromRecord(record)
+
+                    if usable < chunk_records * size:
+                        break
+
+    '''
+    Returns up to the last n entries for a player, newest first. Season resets
+    since the player's first entry are included as they applied to the player.
+    '''
+    def last(self, house, player, n=10) -> Iterable[Entry]:
+        if n <= 0:
+            return []
+
+        seqs, _ = self._index.get((house, player), ((), ()))
+        if not seqs:
+            return []
+
+        resets = ()
+        if player != HOUSE_ACCOUNT:
+            resets, _ = self._seasons.get(house, ((), ()))
+            resets = resets[bisect_right(resets, seqs[0]):]
+
+        entries = []
+        for seq in sorted(list(seqs[-n:]) + list(resets[-n:]),
+                reverse=True)[:n]:
+            entry = self._read(seq)
+            if entry.type is EntryTypes.SEASON_RESET \
+                    and player != HOUSE_ACCOUNT:
+                before = self._balanceBefore(house, player, seq)
+                entry = entry._replace(player=player,
+                        amount=entry.amount - before, balance=entry.amount)
+            entries.append(entry)
+
+        return entries
+
+    # The player's balance right before the given entry, as left by their own
+    # last entry or a season reset since. Only called past their first entry.
+    def _balanceBefore(self, house, player, seq):
+        seqs, _ = self._index[(house, player)]
+        resets, _ = self._seasons.get(house, ((), ()))
+
+        i = bisect_left(seqs, seq)
+        j = bisect_left(resets, seq)
+        if j and resets[j - 1] > seqs[i - 1]:
+            return self._read(resets[j - 1]).amount
+
+        return self._read(seqs[i - 1]).balance
+
+    '''
+    Returns the player's balance as of the given time, or None if the player
+    has no entries. Every entry records the balance after it was applied, so
+    each one doubles as a checkpoint and a lookup never replays history. A
+    season reset is one entry for the whole house, so one newer than the
+    player's last entry decides the balance instead.
+    '''
+    def balanceAt(self, house, player, when) -> Optional[int]:
+        if isinstance(when, datetime.datetime):
+            when = when.timestamp()
+
+        seqs, times = self._index.get((house, player), ((), ()))
+        if not seqs:
+            return None
+
+        i = bisect_right(times, when)
+        if player != HOUSE_ACCOUNT:
+            resets, resetTimes = self._seasons.get(house, ((), ()))
+            j = bisect_right(resetTimes, when)
+            if j and (i == 0 or resets[j - 1] > seqs[i - 1]):
+                return self._read(resets[j - 1]).amount
+
+        if i == 0:
+            # Before the first entry, so undo it to get the opening balance.
+            first = self._read(seqs[0])
+            return first.balance - first.amount
+
+        return self._read(seqs[i - 1]).balance
+
+    def close(self):
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+            self._writer_segment = None
+
+        for reader in self._readers.values():
+            reader.close()
+        self._readers.clear()
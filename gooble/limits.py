@@ -0,0 +1,116 @@
+import time
+
+# What a command costs against a rate limit.
+CHEAP = 1
+EXPENSIVE = 5
+
+class RateLimited(Exception):
+    def __init__(self, retry_after, notify):
+        super().__init__("Slow down! Try again in {:.0f}s.".format(retry_after))
+
+        self.retry_after = retry_after
+
+        # Only the first call turned away in a window should get a reply.
+        self.notify = notify
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "stamp")
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = now
+
+    def refill(self, now) -> float:
+        self.tokens = min(self.capacity,
+                self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        return self.tokens
+
+    def wait(self, cost) -> float:
+        return (cost - self.tokens) / self.rate if self.rate else float("inf")
+
+class RateLimiter:
+    '''
+    Token buckets for each player in a House and one for the House as a whole.
+    Rates are in tokens per second and bursts are the bucket sizes.
+    '''
+    DEFAULTS = {
+        "player_rate": 0.5,
+        "player_burst": 10,
+        "house_rate": 5,
+        "house_burst": 50
+    }
+
+    # Idle buckets are dropped once there are this many.
+    MAX_BUCKETS = 1024
+
+    def __init__(self, **limits):
+        self.configure(**limits)
+
+    '''
+    Raises ValueError for limits that could leave commands unusable: a bucket
+    that never refills, or one too small to ever hold an expensive command.
+    '''
+    def configure(self, **limits):
+        unknown = set(limits) - set(self.DEFAULTS)
+        if unknown:
+            raise ValueError("Unknown limits {}".format(sorted(unknown)))
+
+        limits = dict(self.DEFAULTS, **limits)
+        for scope in ("player", "house"):
+            if not limits[scope + "_rate"] > 0:
+                raise ValueError("The {} rate must be above 0".format(scope))
+            if not limits[scope + "_burst"] >= EXPENSIVE:
+                raise ValueError("The {} burst must be at least {}".format(
+                        scope, EXPENSIVE))
+
+        self.limits = limits
+
+        self._players = {}
+        self._house = None
+        self._notify_after = {}
+
+    def _bucket(self, buckets, key, scope, now):
+        bucket = buckets.get(key, None)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(
+                    self.limits[scope + "_rate"],
+                    self.limits[scope + "_burst"], now)
+
+        return bucket
+
+    '''
+    Charges a call by the given player, raising RateLimited without charging
+    anything if either the player or the House is out of tokens.
+    '''
+    def check(self, pid, cost=CHEAP, now=None):
+        now = time.monotonic() if now is None else now
+
+        if len(self._players) > self.MAX_BUCKETS:
+            self._prune(now)
+
+        player = self._bucket(self._players, pid, "player", now)
+        if self._house is None:
+            self._house = TokenBucket(self.limits["house_rate"],
+                    self.limits["house_burst"], now)
+
+        for key, bucket in ((pid, player), (None, self._house)):
+            if bucket.refill(now) < cost:
+                wait = bucket.wait(cost)
+
+                notify = self._notify_after.get(key, 0) <= now
+                if notify:
+                    self._notify_after[key] = now + wait
+
+                raise RateLimited(wait, notify)
+
+        player.tokens -= cost
+        self._house.tokens -= cost
+
+    def _prune(self, now):
+        for pid, bucket in list(self._players.items()):
+            if bucket.refill(now) >= bucket.capacity:
+                del self._players[pid]
+                self._notify_after.pop(pid, None)
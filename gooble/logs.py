@@ -3,12 +3,17 @@ import logging
 def getLogger():
     return logging.getLogger("gooble")
 
-logger = getLogger()
-logger.setLevel(logging.DEBUG)
+'''
+Sends gooble's log messages to stderr. Only the bot itself does this; just
+importing the package leaves logging alone.
+'''
+def setupLogging(level=logging.DEBUG):
+    logger = getLogger()
+    logger.setLevel(level)
 
-sh = logging.StreamHandler()
-sh.setLevel(logging.DEBUG)
+    sh = logging.StreamHandler()
+    sh.setLevel(level)
 
-formatter = logging.Formatter("[%(asctime)s]: %(levelname)s -> %(message)s")
-sh.setFormatter(formatter)
-logger.addHandler(sh)
+    formatter = logging.Formatter("[%(asctime)s]: %(levelname)s -> %(message)s")
+    sh.setFormatter(formatter)
+    logger.addHandler(sh)
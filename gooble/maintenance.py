@@ -0,0 +1,105 @@
+import os
+import pickle
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Results come back pickled, so their size is known before they're loaded.
+def _call(fn, payload):
+    return pickle.dumps(fn(pickle.loads(payload)), pickle.HIGHEST_PROTOCOL)
+
+class MaintenanceExecutor:
+    '''
+    Runs an operation over many work items, like houses or ledger segments,
+    on a pool of worker processes.
+
+    Each item is serialized once, in the calling process, and the bytes are
+    all a worker ever sees. Results stay serialized until they are handed
+    back. New items are only sent out while the items in flight and the
+    results waiting their turn add up to less than memory_budget bytes
+    (always at least one item, however big), so a full-fleet run never holds
+    more than a bounded slice of the fleet.
+    '''
+    MEMORY_BUDGET = 64 << 20
+
+    def __init__(self, /, workers=None, memory_budget=MEMORY_BUDGET):
+        self.workers = workers or os.cpu_count() or 1
+        self.memory_budget = memory_budget
+
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _getPool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers)
+        return self._pool
+
+    '''
+    Calls fn on each (key, value) pair's value in a worker and yields
+    (key, result, error) in the order the pairs were given, or as they
+    complete if ordered is false. Values are serialized lazily from the
+    iterable, so only the ones in flight are held.
+    '''
+    def imap(self, fn, items, /, progress=None, total=None, ordered=True):
+        pool = self._getPool()
+
+        # Maps each future to its position, key and payload size, and each
+        # position that finished ahead of its turn to its result.
+        pending = {}
+        held = {}
+        heldBytes = pendingBytes = 0
+        submitted = turn = done = 0
+
+        items = iter(items)
+        exhausted = False
+        while pending or not exhausted:
+            # Result sizes are only known once they're back, so a couple of
+            # items per worker is all that's ever allowed to be in flight.
+            while not exhausted and (not pending
+                    or pendingBytes + heldBytes < self.memory_budget
+                    and len(pending) < 2 * self.workers):
+                try:
+                    key, value = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+
+                payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                future = pool.submit(_call, fn, payload)
+                pending[future] = (submitted, key, len(payload))
+                pendingBytes += len(payload)
+                submitted += 1
+
+            if not pending:
+                break
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, key, size = pending.pop(future)
+                pendingBytes -= size
+                done += 1
+
+                error = future.exception()
+                data = b"" if error else future.result()
+                if progress is not None:
+                    progress(done, total)
+
+                if not ordered:
+                    yield key, None if error else pickle.loads(data), error
+                    continue
+
+                held[index] = (key, data, error)
+                heldBytes += len(data)
+                while turn in held:
+                    key, data, error = held.pop(turn)
+                    heldBytes -= len(data)
+                    turn += 1
+                    yield key, None if error else pickle.loads(data), error
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
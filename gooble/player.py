@@ -1,5 +1,9 @@
 from enum import Enum, auto
 
+from .history import PlayerHistory
+from .ledger import EntryTypes
+from .util import nextVersion
+
 class PlayerException(Exception):
     pass
 
@@ -21,21 +25,87 @@ class Player:
     '''
     losses = 0
 
+    '''
+    The player's recent results, created when their first bet settles.
+    '''
+    history = None
+
+    '''
+    The House the player belongs to. It is told about every change to the
+    player's balance.
+    '''
+    house = None
+
+    '''
+    Whether the player stands in for someone the House hasn't stored yet.
+    '''
+    virtual = False
+
+    '''
+    Whether the player was loaded as part of a past season, and so can't
+    change. Players a live House let go of can't change either.
+    '''
+    frozen = False
+
     def __init__(self, pid, balance):
         self.id = pid
         self.balance = balance
 
-    def grant(self, monies):
+        # Changes whenever anything about the player changes. A new object
+        # gets a new version too, so one that replaces another (after a
+        # reload or a new season) never matches what was cached for the old.
+        self.version = nextVersion()
+
+    def grant(self, monies, /, entry=EntryTypes.GRANT, bet=None):
+        self._materialize()
         self.balance += monies
+        self._record(entry, monies, bet)
 
-    def take(self, monies):
+    def take(self, monies, /, entry=EntryTypes.TAKE, bet=None):
+        self._materialize()
         self.balance -= monies
+        self._record(entry, -monies, bet)
+
+    # The House has to know the balance from before the first change.
+    def _materialize(self):
+        if self.frozen or self.house is not None \
+                and not self.house.owns(self):
+            raise PlayerException("Player {} no longer belongs to the House"
+                    .format(self.id))
+        if self.house is not None:
+            # Nothing changes before losses owed from earlier bets are in.
+            self.house.applyLosses()
+            if self.virtual:
+                self.house.materialize(self)
+
+    def _record(self, entry, amount, bet):
+        self._touch()
+        if self.house is not None:
+            self.house.record(self, entry, amount, bet)
+
+    def _touch(self):
+        self.version = nextVersion()
+        if self.house is not None:
+            self.house.touch(self)
 
     def add_win(self) -> None:
+        self._materialize()
         self.wins = self.wins + 1
+        self._addResult(True)
 
-    def add_loss(self) -> None:
+    def add_loss(self, /, when=None) -> None:
+        self._materialize()
         self.losses = self.losses + 1
+        self._addResult(False, when)
+
+    def _addResult(self, won, when=None):
+        if self.history is None:
+            self.history = PlayerHistory()
+
+        # Payouts land before the win is counted, so this is the settled
+        # balance.
+        self.history.record(won, self.balance, when=when)
+        self._touch()
 
     @property
     def win_rate(self) -> float:
@@ -55,13 +125,18 @@ class Player:
 
     @property
     def json(self):
-        return {
+        value = {
             "id": self.id,
             "balance": self.balance,
             "wins": self.wins,
             "losses": self.losses
         }
 
+        if self.history is not None:
+            value["history"] = self.history.tobytes()
+
+        return value
+
     @classmethod
     def fromJSON(cls, value):
 
@@ -74,7 +149,31 @@ class Player:
 
         self.wins = value.get("wins", 0)
         self.losses = value.get("losses", 0)
+
+        if "history" in value:
+            self.history = PlayerHistory.frombytes(value["history"])
     
         return self
-        
 
+'''
+Returns the given players sorted for a leaderboard, best first, along with a
+function that renders the value each one is ranked by.
+'''
+def rankPlayers(players, type: LeaderboardTypes):
+    postfix = ''
+
+    if type == LeaderboardTypes.WINS:
+        ext_method = lambda x: x.wins
+    elif type == LeaderboardTypes.WIN_RATE:
+        ext_method = lambda x: x.win_rate
+        postfix = '%'
+    elif type == LeaderboardTypes.LOSSES:
+        ext_method = lambda x: x.losses
+    elif type == LeaderboardTypes.LOSS_RATE:
+        ext_method = lambda x: x.loss_rate
+        postfix = '%'
+    elif type == LeaderboardTypes.MONEY:
+        ext_method = lambda x: x.balance
+
+    ranked = sorted(players, key=ext_method, reverse=True)
+    return ranked, lambda player: str(ext_method(player)) + postfix
@@ -0,0 +1,65 @@
+import asyncio
+
+from .logs import getLogger
+logger = getLogger()
+
+class ReactionBatcher:
+    '''
+    Buffers reaction events per key (a message) and hands them to a coroutine
+    in one batch when the window after its first event closes, so a burst of
+    reactions costs one pass over the bet and one message edit.
+    '''
+    WINDOW = 1.5
+
+    def __init__(self, flush, /, window=WINDOW):
+        self.flush = flush
+        self.window = window
+
+        self._pending = {}
+
+        # The flushes still waiting for their window to close, per key.
+        self._timers = {}
+
+        # The event loop only holds weak references to tasks, so the pending
+        # flushes are kept here until they finish.
+        self._tasks = set()
+
+    def push(self, key, event):
+        events = self._pending.get(key, None)
+        if events is None:
+            events = self._pending[key] = []
+            task = self._timers[key] = asyncio.ensure_future(
+                    self._flushLater(key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        events.append(event)
+
+    '''
+    Flushes every pending batch without waiting for its window to close, and
+    waits for the flushes already underway.
+    '''
+    async def close(self):
+        for task in self._timers.values():
+            task.cancel()
+        self._timers.clear()
+
+        pending, self._pending = self._pending, {}
+        for key, events in pending.items():
+            await self._flush(key, events)
+
+        if self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+    async def _flushLater(self, key):
+        await asyncio.sleep(self.window)
+
+        del self._timers[key]
+        await self._flush(key, self._pending.pop(key))
+
+    async def _flush(self, key, events):
+        logger.debug("Flushing {} reaction(s) for {}".format(len(events), key))
+        try:
+            await self.flush(key, events)
+        except Exception as e:
+            logger.error("could not apply reactions; {}".format(e))
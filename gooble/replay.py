@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+'''
+Replays a command trace recorded by the bot (see gooble.trace) against the
+House and Bet core, without Discord, and reports how long each command took
+and checksums of the final state.
+
+    GOOBLE_TRACE=guild.trace python -m gooble
+    python -m gooble.replay guild.trace
+    python -m gooble.replay guild.trace --speed 1 --json > v2.json
+
+Running the same trace through two versions and comparing the reports shows
+both performance changes and whether the results still match.
+'''
+
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+from bisect import bisect_left, insort
+
+from .bet import _BETS_BY_TYPE, encodeBetId
+from .house import House
+from .ledger import EntryTypes, Ledger
+from .player import LeaderboardTypes
+from .trace import readTrace
+
+class UnmappedBetException(Exception):
+    pass
+
+'''
+Each command is replayed by a function taking the replayer, the house, the
+invoking player and channel, and the command's recorded arguments. They make
+the same calls into the core that the bot's commands do.
+'''
+COMMANDS = {}
+def replays(*names):
+    def decorator(fn):
+        for name in names:
+            COMMANDS[name] = fn
+        return fn
+    return decorator
+
+@replays("games")
+def _games(replayer, house, player, channel):
+    return [ game.FRIENDLY_DESCRIPTION for game, _ in _BETS_BY_TYPE.values() ]
+
+@replays("gift")
+def _gift(replayer, house, player, channel, recipient, amount):
+    house.getPlayer(recipient).grant(amount, EntryTypes.GIFT)
+
+@replays("giftall")
+def _giftall(replayer, house, player, channel, amount):
+    for target in list(house.players.values()):
+        target.grant(amount, EntryTypes.GIFT)
+
+@replays("bet")
+def _bet(replayer, house, player, channel, game, statement, timeout=None,
+        min_bet=None):
+    house.newBet(game, statement, timeout=timeout, min_bet=min_bet,
+            channel=channel)
+
+@replays("pool")
+def _pool(replayer, house, player, channel, statement, *outcomes):
+    house.newBet("pm", statement, outcomes=outcomes, channel=channel)
+
+@replays("reactbet")
+def _reactbet(replayer, house, player, channel, game, statement, stake,
+        timeout=None):
+    house.newBet(game, statement, stake=stake, timeout=timeout,
+            channel=channel)
+
+@replays("react")
+def _react(replayer, house, player, channel, betid, events):
+    bet = house.findBet(replayer.betId(house, betid))
+    if bet is not None:
+        bet.applyReactions([ (house.getPlayer(pid), emoji, added)
+                for pid, emoji, added in events ])
+
+@replays("bets")
+def _bets(replayer, house, player, channel):
+    return house.betsIn(channel)
+
+@replays("place")
+def _place(replayer, house, player, channel, stake, wager, betid=None):
+    bet = house.getBet(replayer.betId(house, betid), channel)
+    bet.addPlayer(player, stake, wager)
+
+@replays("preview")
+def _preview(replayer, house, player, channel, stake, wager, betid=None):
+    bet = house.getBet(replayer.betId(house, betid), channel)
+    return bet.preview(player, stake, wager)
+
+@replays("cancel")
+def _cancel(replayer, house, player, channel, betid=None):
+    house.cancelBet(replayer.betId(house, betid), channel)
+
+@replays("stat")
+def _stat(replayer, house, player, channel, member=None):
+    if member is not None:
+        target = house.getPlayer(member)
+        return target.balance, target.wins, target.losses, target.win_rate
+
+    return [ (p.id, p.balance) for p in house.players.values() ]
+
+@replays("history")
+def _history(replayer, house, player, channel, member=None, days=30):
+    target = house.getPlayer(member) if member is not None else player
+    if target.history is not None:
+        return (target.history.balancesSince(time.time() - days * 86400),
+                target.history.recent(20), target.history.streak())
+
+@replays("details")
+def _details(replayer, house, player, channel, betid=None):
+    bet = house.getBet(replayer.betId(house, betid), channel)
+    return bet.getStakes(), bet.odds() if bet.NAMED_OUTCOMES else None
+
+@replays("payout")
+def _payout(replayer, house, player, channel, result, betid=None):
+    house.endBet(replayer.betId(house, betid), result, channel)
+
+@replays("settle")
+def _settle(replayer, house, player, channel, *pairs):
+    house.endBets(zip([ replayer.betId(house, betid)
+            for betid in pairs[0::2] ], pairs[1::2]))
+
+@replays("transfer")
+def _transfer(replayer, house, player, channel, amount, recipient=None):
+    target = house.getPlayer(recipient) if recipient is not None else None
+    house.transferFunds(player, amount, target)
+
+@replays("transactions")
+def _transactions(replayer, house, player, channel, member=None, count=10):
+    if replayer.ledger is not None:
+        target = member if member is not None else player.id
+        return replayer.ledger.last(house.id, target, count)
+
+@replays("leaderboard")
+def _leaderboard(replayer, house, player, channel, type):
+    return house.getLeaderboard(
+            LeaderboardTypes[type.upper().replace(" ", "_")])
+
+@replays("newseason")
+def _newseason(replayer, house, player, channel):
+    house.newSeason()
+
+@replays("season")
+def _season(replayer, house, player, channel, number, type="money"):
+    return house.getSeason(number).getLeaderboard(
+            LeaderboardTypes[type.upper().replace(" ", "_")])
+
+@replays("ratelimit")
+def _ratelimit(replayer, house, player, channel, player_rate, player_burst,
+        house_rate, house_burst):
+    house.limiter.configure(player_rate=player_rate,
+            player_burst=player_burst, house_rate=house_rate,
+            house_burst=house_burst)
+
+# Commands that only show things kept outside of the core.
+@replays("help", "bonk", "cachestats", "replica")
+def _noop(replayer, house, player, channel, *args, **kwargs):
+    pass
+
+'''
+Checksums the parts of a House that commands decide, leaving out the times
+things happened at, so two replays of a trace can be compared.
+'''
+def houseChecksum(house) -> str:
+    state = {
+        "players": { str(p.id): [p.balance, p.wins, p.losses]
+            for p in house.players.values() },
+        "archived": sorted(map(str, house.archived)),
+        "community_pool": house.community_pool,
+        "bets": { bet.id: sorted([ [str(p.id), stake, str(wager)]
+            for p, stake, wager in bet.getStakes() ])
+            for bet in house.bets.values() },
+        "season": house.season
+    }
+
+    data = json.dumps(state, sort_keys=True)
+    return hashlib.sha1(data.encode()).hexdigest()
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+class Replayer:
+    def __init__(self, /, ledger=None):
+        self.ledger = ledger
+        self.houses = {}
+
+        # Per command: replayed timings (seconds), recorded timings (ms),
+        # errors, and how often the outcome differed from the recording.
+        self.timings = {}
+        self.recorded = {}
+        self.errors = {}
+        self.diverged = {}
+        self.skipped = {}
+        self.unmapped = {}
+
+        # Maps (house, recorded bet id) to the id the bet got in the replay,
+        # and each house to its recorded bet ids in order.
+        self._betids = {}
+        self._recorded = {}
+
+    def getHouse(self, hid) -> House:
+        house = self.houses.get(hid, None)
+        if house is None:
+            house = self.houses[hid] = House(hid)
+            house.ledger = self.ledger
+
+        return house
+
+    '''
+    Turns a recorded bet id, or a prefix of one, into the id of the same bet
+    in the replay. Ids of bets the trace never saw being created can't be
+    told apart from the replay's own, so they raise UnmappedBetException.
+    '''
+    def betId(self, house, betid):
+        if betid is None:
+            return None
+
+        betid = str(betid).lower()
+        replayed = self._betids.get((house.id, betid), None)
+        if replayed is not None:
+            return replayed
+
+        recorded = self._recorded.get(house.id, [])
+        i = bisect_left(recorded, betid)
+        matches = []
+        while i < len(recorded) and recorded[i].startswith(betid):
+            matches.append(self._betids[(house.id, recorded[i])])
+            i += 1
+
+        # Like findBet, a prefix only has to pick out one open bet.
+        if len(matches) > 1:
+            matches = [ m for m in matches if m in house.bets ]
+        if len(matches) != 1:
+            raise UnmappedBetException(betid)
+
+        return matches[0]
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, dict) and "player" in value:
+            return value["player"]
+        if isinstance(value, list):
+            return [ Replayer._decode(v) for v in value ]
+        return value
+
+    '''
+    Replays records as fast as possible, or at the given multiple of the
+    speed they were recorded at.
+    '''
+    def run(self, records, /, speed=0):
+        started = time.perf_counter()
+        for record in records:
+            if speed:
+                delay = record["t"] / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+            self.step(record)
+
+    def step(self, record):
+        command = record["command"]
+        handler = COMMANDS.get(command, None)
+        if handler is None:
+            self.skipped[command] = self.skipped.get(command, 0) + 1
+            return
+
+        house = self.getHouse(record["house"])
+        author = record.get("author", None)
+        player = house.getPlayer(author) if author is not None else None
+
+        args = [ self._decode(arg) for arg in record.get("args", []) ]
+        kwargs = { k: self._decode(v)
+                for k, v in record.get("kwargs", {}).items() }
+
+        counter = house.bet_counter
+        ok = True
+        started = time.perf_counter()
+        try:
+            handler(self, house, player, record.get("channel", None),
+                    *args, **kwargs)
+        except UnmappedBetException:
+            # Replaying it against some other bet would be meaningless.
+            self.unmapped[command] = self.unmapped.get(command, 0) + 1
+            return
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+
+        self.timings.setdefault(command, []).append(elapsed)
+        self.recorded.setdefault(command, []).append(record.get("ms", 0))
+        if not ok:
+            self.errors[command] = self.errors.get(command, 0) + 1
+        if ok != record.get("ok", True):
+            self.diverged[command] = self.diverged.get(command, 0) + 1
+
+        if record.get("bet") and house.bet_counter != counter:
+            self._betids[(house.id, record["bet"])] = \
+                    encodeBetId(house.bet_counter)
+            insort(self._recorded.setdefault(house.id, []), record["bet"])
+
+    def checksums(self):
+        return { str(hid): houseChecksum(house)
+                for hid, house in self.houses.items() }
+
+    def report(self):
+        commands = {}
+        for command, timings in self.timings.items():
+            commands[command] = {
+                "count": len(timings),
+                "errors": self.errors.get(command, 0),
+                "diverged": self.diverged.get(command, 0),
+                "total_ms": sum(timings) * 1000,
+                "mean_ms": sum(timings) * 1000 / len(timings),
+                "p50_ms": _percentile(timings, 0.5) * 1000,
+                "p95_ms": _percentile(timings, 0.95) * 1000,
+                "recorded_mean_ms": sum(self.recorded[command]) / len(timings)
+            }
+
+        checksums = self.checksums()
+        overall = hashlib.sha1("".join(checksums[hid]
+                for hid in sorted(checksums)).encode()).hexdigest()
+
+        return {
+            "commands": commands,
+            "skipped": self.skipped,
+            "unmapped": self.unmapped,
+            "houses": checksums,
+            "checksum": overall
+        }
+
+def _printReport(report, out):
+    print("{:<14} {:>7} {:>6} {:>8} {:>10} {:>10} {:>10} {:>12}".format(
+            "command", "count", "errors", "diverged", "mean ms", "p50 ms",
+            "p95 ms", "recorded ms"), file=out)
+
+    commands = report["commands"]
+    for command in sorted(commands, key=lambda c: -commands[c]["total_ms"]):
+        c = commands[command]
+        print("{:<14} {:>7} {:>6} {:>8} {:>10.4f} {:>10.4f} {:>10.4f} {:>12.3f}"
+                .format(command, c["count"], c["errors"], c["diverged"],
+                c["mean_ms"], c["p50_ms"], c["p95_ms"], c["recorded_mean_ms"]),
+                file=out)
+
+    for command, count in sorted(report["skipped"].items()):
+        print("skipped {} unknown '{}' command(s)".format(count, command),
+                file=out)
+
+    for command, count in sorted(report["unmapped"].items()):
+        print("skipped {} '{}' command(s) on bets from before the trace"
+                .format(count, command), file=out)
+
+    print("\n{} house(s), state checksum {}".format(len(report["houses"]),
+            report["checksum"]), file=out)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gooble.replay",
+            description="Replay a recorded command trace against the core.")
+    parser.add_argument("trace")
+    parser.add_argument("--speed", type=float, default=0,
+            help="replay at this multiple of the recorded pace " +
+                "(default: as fast as possible)")
+    parser.add_argument("--ledger", action="store_true",
+            help="write a ledger (to a temporary directory) like the bot does")
+    parser.add_argument("--json", action="store_true",
+            help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    _, records = readTrace(args.trace)
+
+    with tempfile.TemporaryDirectory() as path:
+        ledger = Ledger(path) if args.ledger else None
+        replayer = Replayer(ledger=ledger)
+
+        started = time.perf_counter()
+        replayer.run(records, speed=args.speed)
+        elapsed = time.perf_counter() - started
+
+        if ledger is not None:
+            ledger.close()
+
+    report = replayer.report()
+    report["elapsed_s"] = elapsed
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        _printReport(report, sys.stdout)
+        print("Replayed in {:.3f}s".format(elapsed))
+
+if __name__ == "__main__":
+    main()
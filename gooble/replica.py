@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+'''
+Hot-standby replication. The primary bot journals which players, bets and
+houses change and, at the end of every command, ships their new state to a
+follower process. The follower keeps an in-memory copy and takes over if
+the primary goes away without saying goodbye.
+
+    python -m gooble.replica 127.0.0.1:6001 --takeover
+    GOOBLE_REPLICA=127.0.0.1:6001 python -m gooble
+
+Both sides must share a secret in GOOBLE_REPLICA_KEY; neither starts
+without one. The connection unpickles whatever arrives on it, so anyone
+holding the key can run code on either side, and the link is not
+encrypted. Keep it on loopback, a unix socket or a network you trust
+completely; the follower refuses any other address unless started with
+--listen-anywhere.
+'''
+
+import os
+import sys
+import json
+import time
+import queue
+import shelve
+import hashlib
+import argparse
+import ipaddress
+import threading
+from multiprocessing.connection import Client, Listener
+
+from .bet import Bet
+from .house import House
+from .player import Player
+from .storage import saveHouses
+
+from .logs import getLogger, setupLogging
+logger = getLogger()
+
+class ReplicaException(Exception):
+    pass
+
+'''
+Turns "host:port" into a TCP address; anything else is a socket path.
+'''
+def parseAddress(value):
+    host, sep, port = value.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+
+    return value
+
+'''
+Whether an address only accepts connections from this machine.
+'''
+def isLocal(address) -> bool:
+    if isinstance(address, str):
+        return True
+
+    host = address[0]
+    if host == "localhost":
+        return True
+
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def authKey():
+    key = os.environ.get("GOOBLE_REPLICA_KEY", None)
+    if not key:
+        raise ReplicaException("GOOBLE_REPLICA_KEY must be set to a shared " +
+                "secret to use a replica")
+
+    return key.encode()
+
+'''
+The state of a House as the follower keeps it: its json split up so that
+single players and bets can be replaced by id.
+'''
+def houseState(house):
+    value = house.json
+    return {
+        "meta": house.meta,
+        "players": { p["id"]: p for p in value["players"] },
+        "archived": { p["id"]: p for p in value["archived"] },
+        "bets": { b["id"]: b for b in value["bets"] },
+        "seasons": value["seasons"]
+    }
+
+def houseJSON(state):
+    value = dict(state["meta"])
+    value.update({
+        "players": list(state["players"].values()),
+        "archived": list(state["archived"].values()),
+        "bets": list(state["bets"].values()),
+        "seasons": state["seasons"]
+    })
+    return value
+
+def _encode(value):
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError("{} can't be checksummed".format(type(value).__name__))
+
+def checksum(state) -> str:
+    data = json.dumps(state, sort_keys=True, default=_encode)
+    return hashlib.sha1(data.encode()).hexdigest()
+
+class ChangeJournal:
+    '''
+    Collects which houses, players and bets changed since the last drain.
+    Marking is O(1); drain() turns the marks into records holding the
+    current state of just those objects.
+    '''
+
+    def __init__(self):
+        # Maps a house id to [house, whole house changed, players, bets].
+        self._dirty = {}
+        self._extra = []
+
+    def __len__(self):
+        return len(self._dirty) + len(self._extra)
+
+    def mark(self, house, changed):
+        entry = self._dirty.get(house.id, None)
+        if entry is None:
+            entry = self._dirty[house.id] = [house, False, {}, {}]
+
+        for obj in changed:
+            if obj is house:
+                entry[1] = True
+            elif isinstance(obj, Player):
+                entry[2][obj.id] = obj
+            elif isinstance(obj, Bet):
+                entry[3][obj.id] = obj
+
+    def markAll(self, house):
+        self.mark(house, (house,))
+
+    def dropHouse(self, hid):
+        self._dirty.pop(hid, None)
+        self._extra.append(("drophouse", hid))
+
+    def clear(self):
+        self._dirty.clear()
+        self._extra.clear()
+
+    def drain(self):
+        # Counting losses marks the losing players, so it comes first.
+        for house, *_ in list(self._dirty.values()):
+            house.applyLosses()
+
+        records = self._extra
+        self._extra = []
+
+        for hid, (house, full, players, bets) in self._dirty.items():
+            if full:
+                records.append(("house", hid, houseState(house)))
+                continue
+
+            records.append(("meta", hid, house.meta))
+
+            for pid in players:
+                if pid in house.players:
+                    records.append(("player", hid, pid,
+                            house.players[pid].json))
+                elif pid in house.archived:
+                    records.append(("archived", hid, pid, house.archived[pid]))
+                else:
+                    records.append(("player", hid, pid, None))
+
+            for betid in bets:
+                bet = house.bets.get(betid, None)
+                records.append(("bet", hid, betid,
+                        bet.json if bet is not None else None))
+
+        self._dirty.clear()
+        return records
+
+class Primary:
+    '''
+    The sending side, owned by the bot. Records are built on the event loop
+    (where the state lives) and handed to a thread that does the socket I/O
+    and collects acknowledgements, so a slow or missing follower never
+    holds up a command.
+    '''
+    POLL_SECONDS = 1
+    RETRY_SECONDS = 10
+
+    def __init__(self, address, /, authkey=None):
+        self.address = address
+        self.authkey = authkey or authKey()
+        self.journal = ChangeJournal()
+
+        self.seq = 0
+        self.acked = 0
+        self.ack_delay = None
+        self.mismatches = 0
+
+        # Houses the follower disagreed with, to be sent again in full.
+        self._mismatched = set()
+
+        # Counts connections. Messages are tagged with the connection they
+        # were built for, and only sent on that one; the first flush for a
+        # new connection starts the follower over in full.
+        self._generation = 0
+        self._synced_generation = None
+
+        # Maps the sequence number of each unacknowledged message to when it
+        # was sent. Shared with the sending thread.
+        self._sent = {}
+        self._lock = threading.Lock()
+
+        self._conn = None
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def lag(self) -> int:
+        return self.seq - self.acked
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None
+
+    @property
+    def _synced(self) -> bool:
+        return self._synced_generation == self._generation
+
+    def attach(self, house):
+        house.journal = self.journal
+        if self._synced:
+            self.journal.markAll(house)
+
+    def dropHouse(self, hid):
+        self.journal.dropHouse(hid)
+
+    def _enqueue(self, generation, kind, payload):
+        now = time.time()
+        with self._lock:
+            self.seq += 1
+            self._sent[self.seq] = now
+
+        self._queue.put((generation, (kind, self.seq, now, payload)))
+
+    '''
+    Ships everything that changed since the last flush. After a (re)connect
+    the follower gets every house in full instead, so nothing is kept while
+    there is no follower.
+    '''
+    def flush(self, houses):
+        # Read before the connection, which is only set once it's counted.
+        generation = self._generation
+        if not self.connected:
+            self.journal.clear()
+            return
+
+        if self._synced_generation != generation:
+            self._synced_generation = generation
+            self.journal.clear()
+            records = [("reset",)] + [ ("house", house.id, houseState(house))
+                    for house in houses.values() ]
+        else:
+            while self._mismatched:
+                house = houses.get(self._mismatched.pop(), None)
+                if house is not None:
+                    self.journal.markAll(house)
+
+            records = self.journal.drain()
+
+        if records:
+            self._enqueue(generation, "batch", records)
+
+    '''
+    Asks the follower to compare its copy of every house against ours.
+    '''
+    def check(self, houses):
+        self.flush(houses)
+
+        # A follower that hasn't had its reset yet has nothing to compare.
+        generation = self._generation
+        if not self.connected or self._synced_generation != generation:
+            return
+
+        self._enqueue(generation, "check", { house.id:
+                checksum(houseState(house)) for house in houses.values() })
+
+    def close(self, /, timeout=5):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        retry = 0
+        while True:
+            try:
+                message = self._queue.get(timeout=self.POLL_SECONDS)
+            except queue.Empty:
+                message = ()
+
+            if message is None:
+                break
+
+            # Keep trying to reach the follower in the background.
+            if self._conn is None:
+                if time.time() < retry:
+                    continue
+
+                try:
+                    conn = Client(self.address, authkey=self.authkey)
+                except OSError as e:
+                    logger.debug("replica at {} is unavailable; {}".format(
+                            self.address, e))
+                    retry = time.time() + self.RETRY_SECONDS
+                    continue
+
+                self._generation += 1
+                self._conn = conn
+                logger.info("Connected to replica at {}".format(self.address))
+
+            # Anything queued for an earlier connection was meant for another
+            # follower, or came before the reset this one is waiting for.
+            if message and message[0] != self._generation:
+                with self._lock:
+                    self._sent.pop(message[1][1], None)
+                continue
+
+            try:
+                if message:
+                    self._conn.send(message[1])
+
+                while self._conn.poll():
+                    self._receive(self._conn.recv())
+            except (OSError, EOFError) as e:
+                logger.error("lost replica at {}; {}".format(self.address, e))
+                self._disconnect()
+
+        if self._conn is not None:
+            try:
+                self._conn.send(("bye",))
+            except OSError:
+                pass
+        self._disconnect()
+
+    def _receive(self, reply):
+        kind, seq, *rest = reply
+        with self._lock:
+            self.acked = max(self.acked, seq)
+
+            sent = self._sent.pop(seq, None)
+            if sent is not None:
+                self.ack_delay = time.time() - sent
+
+            # Anything older was acknowledged or lost with a connection.
+            for old in [ s for s in self._sent if s < seq ]:
+                del self._sent[old]
+
+        if kind == "check" and rest[0]:
+            self.mismatches += len(rest[0])
+            logger.error("replica disagrees about house(s) {}".format(rest[0]))
+            self._mismatched.update(rest[0])
+
+    def _disconnect(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+        self._conn = None
+
+        # Whatever the follower had may be gone; the next connection starts
+        # over in full.
+        with self._lock:
+            self.acked = self.seq
+            self._sent.clear()
+
+class Follower:
+    '''
+    The receiving side: applies records to plain dictionaries, so keeping up
+    costs a dict update per changed object, and only builds real Houses when
+    taking over.
+    '''
+
+    def __init__(self):
+        # Maps a house id to its state, as made by houseState().
+        self.houses = {}
+        self.seq = 0
+
+        # When the last message arrived and how long it took to get here.
+        self.applied_at = None
+        self.delay = None
+
+    def apply(self, records):
+        for record in records:
+            kind, *args = record
+            if kind == "reset":
+                self.houses.clear()
+                continue
+
+            if kind == "house":
+                hid, state = args
+                self.houses[hid] = state
+                continue
+
+            if kind == "drophouse":
+                self.houses.pop(args[0], None)
+                continue
+
+            # Changes to a house we were never sent wait for the next sync.
+            state = self.houses.get(args[0], None)
+            if state is None:
+                continue
+
+            if kind == "meta":
+                state["meta"] = args[1]
+            elif kind == "player":
+                _, pid, value = args
+                state["archived"].pop(pid, None)
+                if value is None:
+                    state["players"].pop(pid, None)
+                else:
+                    state["players"][pid] = value
+            elif kind == "archived":
+                _, pid, value = args
+                state["players"].pop(pid, None)
+                state["archived"][pid] = value
+            elif kind == "bet":
+                _, betid, value = args
+                if value is None:
+                    state["bets"].pop(betid, None)
+                else:
+                    state["bets"][betid] = value
+            else:
+                raise ReplicaException("unknown record '{}'".format(kind))
+
+    def compare(self, checksums):
+        ids = set(checksums) | set(self.houses)
+        return sorted((hid for hid in ids if hid not in self.houses
+                or checksums.get(hid, None) != checksum(self.houses[hid])),
+                key=str)
+
+    '''
+    Handles a message from the primary and returns the reply, if any.
+    '''
+    def handle(self, message):
+        kind, seq, sent, payload = message
+        self.seq = seq
+        self.applied_at = time.time()
+        self.delay = self.applied_at - sent
+
+        if kind == "batch":
+            self.apply(payload)
+            return ("ack", seq)
+        if kind == "check":
+            return ("check", seq, self.compare(payload))
+
+        raise ReplicaException("unknown message '{}'".format(kind))
+
+    def toHouses(self):
+        return [ House.fromJSON(houseJSON(state))
+                for state in self.houses.values() ]
+
+'''
+Follows primaries one connection at a time. Returns the follower once a
+primary goes away without saying goodbye.
+'''
+def follow(listener, /, follower=None):
+    follower = follower or Follower()
+
+    while True:
+        with listener.accept() as conn:
+            logger.info("Primary connected from {}".format(
+                    listener.last_accepted))
+            try:
+                while True:
+                    message = conn.recv()
+                    if message[0] == "bye":
+                        logger.info("Primary shut down cleanly")
+                        break
+
+                    reply = follower.handle(message)
+                    if reply is not None:
+                        conn.send(reply)
+            except (OSError, EOFError):
+                logger.error("Primary went away after message {}, {:.3f}s "
+                        "behind".format(follower.seq, follower.delay or 0))
+                return follower
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gooble.replica",
+            description="Run a hot-standby replica of a gooble bot.")
+    parser.add_argument("address", help="host:port or socket path to listen on")
+    parser.add_argument("--db", default="gooble.db",
+            help="where to save the replicated state on takeover")
+    parser.add_argument("--takeover", action="store_true",
+            help="start the bot after the primary fails")
+    parser.add_argument("--listen-anywhere", action="store_true",
+            help="allow listening on an address other machines can reach; " +
+                "only do this on a network you trust completely")
+    args = parser.parse_args(argv)
+
+    setupLogging()
+
+    address = parseAddress(args.address)
+    if not isLocal(address) and not args.listen_anywhere:
+        parser.error("{} is reachable from other machines; ".format(
+                args.address) + "pass --listen-anywhere if you mean it")
+
+    try:
+        authkey = authKey()
+    except ReplicaException as e:
+        parser.error(str(e))
+
+    with Listener(address, authkey=authkey) as listener:
+        follower = follow(listener)
+
+    started = time.time()
+    houses = follower.toHouses()
+    with shelve.open(args.db) as db:
+        saveHouses(db, houses)
+    logger.info("Saved {} house(s) in {:.3f}s".format(len(houses),
+            time.time() - started))
+
+    if args.takeover:
+        token = os.environ.get("TOKEN", None)
+        if not token:
+            logger.error("TOKEN is not set; not taking over")
+            sys.exit(1)
+
+        from . import Gooble
+        bot = Gooble()
+        bot.DB_NAME = args.db
+        bot.run(token)
+
+if __name__ == "__main__":
+    main()
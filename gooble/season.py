@@ -0,0 +1,79 @@
+import datetime
+from types import MappingProxyType
+from typing import Iterable, Tuple
+
+from .player import LeaderboardTypes, Player, rankPlayers
+
+class Season:
+    '''
+    A read-only snapshot of a House as it stood at the end of a season.
+
+    Starting a new season hands the House's player dictionaries over to the
+    snapshot as they are and gives the House fresh ones, so nothing is copied
+    on rollover. The players left behind are no longer the House's, which
+    makes them refuse any further change. Leaderboards are ranked the first
+    time they're asked for and kept for good.
+    '''
+
+    def __init__(self, number, started, ended, players, /, archived=None,
+            community_pool=0):
+        self.number = number
+        self.started = started
+        self.ended = ended
+        self.community_pool = community_pool
+
+        self._players = players
+        self._archived = archived if archived is not None else {}
+
+        # Maps a leaderboard type to its ranking and how values are shown.
+        self._rankings = {}
+
+    @property
+    def players(self):
+        return MappingProxyType(self._players)
+
+    @property
+    def start_time(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.started)
+
+    @property
+    def end_time(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.ended)
+
+    def __len__(self):
+        return len(self._players)
+
+    def getLeaderboard(self, type: LeaderboardTypes, limit: int = 10) -> Iterable[Tuple[Player, str]]:
+        ranking = self._rankings.get(type, None)
+        if ranking is None:
+            ranking = self._rankings[type] = rankPlayers(
+                    self._players.values(), type)
+
+        ranked, render = ranking
+        return [ (player, render(player)) for player in ranked[:limit] ]
+
+    @property
+    def json(self):
+        return {
+            "number": self.number,
+            "started": self.started,
+            "ended": self.ended,
+            "community_pool": self.community_pool,
+            "players": list(map(lambda k: k.json, self._players.values())),
+            "archived": list(self._archived.values())
+        }
+
+    @classmethod
+    def fromJSON(cls, value):
+        players = {}
+        for playerJSON in value.get("players", []):
+            player = Player.fromJSON(playerJSON)
+            player.frozen = True
+            players[player.id] = player
+
+        archived = { playerJSON["id"]: playerJSON
+                for playerJSON in value.get("archived", []) }
+
+        return cls(value["number"], value["started"], value["ended"], players,
+                archived=archived,
+                community_pool=value.get("community_pool", 0))
@@ -0,0 +1,48 @@
+'''
+Each House is saved under its own key in the shelve database so any one of
+them can be read without unpickling the rest. Older databases kept every
+house in a single list under LEGACY_KEY; those are still read and are
+rewritten the next time the houses are saved.
+'''
+
+HOUSE_PREFIX = "house:"
+LEGACY_KEY = "houses"
+
+def houseKey(hid) -> str:
+    return "{}{}".format(HOUSE_PREFIX, hid)
+
+def houseKeys(db):
+    return [ key for key in db.keys() if key.startswith(HOUSE_PREFIX) ]
+
+'''
+Yields the saved House dictionaries one at a time, optionally only the ones
+with the given ids.
+'''
+def iterHouses(db, /, houses=None):
+    wanted = set(map(str, houses)) if houses else None
+
+    for houseDict in db.get(LEGACY_KEY, []):
+        if wanted is None or str(houseDict["id"]) in wanted:
+            yield houseDict
+
+    if wanted is None:
+        keys = houseKeys(db)
+    else:
+        keys = [ houseKey(hid) for hid in wanted ]
+
+    for key in keys:
+        if key in db:
+            yield db[key]
+
+def saveHouses(db, houses):
+    stale = set(houseKeys(db))
+    for house in houses:
+        key = houseKey(house.id)
+        db[key] = house.json
+        stale.discard(key)
+
+    # Houses that were dropped since the last save.
+    for key in stale:
+        del db[key]
+
+    db.pop(LEGACY_KEY, None)
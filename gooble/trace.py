@@ -0,0 +1,104 @@
+import json
+import time
+from typing import Iterable
+
+from .logs import getLogger
+logger = getLogger()
+
+TRACE_VERSION = 1
+
+class TraceException(Exception):
+    pass
+
+class TraceRecorder:
+    '''
+    Writes command invocations to a JSON lines file, one per line after a
+    header, for replaying later. Guild, user and channel ids are swapped for
+    small numbers handed out in order of appearance, so a trace carries the
+    shape of the traffic and not who it came from.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.started = time.time()
+        self.count = 0
+
+        # Maps (kind, real id) to the number standing in for it, and each kind
+        # to how many ids of it have been seen.
+        self._ids = {}
+        self._counts = {}
+
+        # Line buffered, so a crash loses at most the command in flight.
+        self._file = open(path, "w", buffering=1)
+        self._write({ "version": TRACE_VERSION, "started": self.started })
+
+    def anonymize(self, kind, value):
+        if value is None:
+            return None
+
+        key = (kind, value)
+        anon = self._ids.get(key, None)
+        if anon is None:
+            anon = self._ids[key] = self._counts[kind] = \
+                    self._counts.get(kind, 0) + 1
+
+        return anon
+
+    '''
+    Makes a converted command argument safe to write: members become their
+    anonymized id and anything else that isn't plain data becomes a string.
+    '''
+    def encodeArg(self, value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, (list, tuple)):
+            return [ self.encodeArg(v) for v in value ]
+        if isinstance(getattr(value, "id", None), int):
+            return { "player": self.anonymize("player", value.id) }
+
+        return str(value)
+
+    def record(self, command, house, author, channel, args, /, kwargs=None,
+            elapsed=0, ok=True, bet=None):
+        self._write({
+            "t": round(time.time() - self.started, 6),
+            "house": self.anonymize("house", house),
+            "author": self.anonymize("player", author),
+            "channel": self.anonymize("channel", channel),
+            "command": command,
+            "args": [ self.encodeArg(arg) for arg in args ],
+            "kwargs": { k: self.encodeArg(v) for k, v in (kwargs or {}).items() },
+            "ms": round(elapsed * 1000, 3),
+            "ok": ok,
+            "bet": bet
+        })
+        self.count += 1
+
+    def _write(self, value):
+        self._file.write(json.dumps(value, separators=(",", ":")) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info("Recorded {} command(s) to {}".format(self.count,
+                    self.path))
+
+'''
+Reads a trace file, returning its header and an iterator over its records.
+'''
+def readTrace(path) -> Iterable[dict]:
+    f = open(path)
+    header = json.loads(f.readline() or "{}")
+    if header.get("version") != TRACE_VERSION:
+        f.close()
+        raise TraceException("{} is not a version {} trace".format(path,
+                TRACE_VERSION))
+
+    def records():
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    return header, records()
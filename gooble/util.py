@@ -1,57 +1,25 @@
-import argparse
+import itertools
+from array import array
 
-import discord
+_VERSIONS = itertools.count(1)
 
-from . import DEFAULT_COLOR
+'''
+Returns a version number that has never been handed out before, so a version
+also tells apart objects that replaced each other.
+'''
+def nextVersion():
+    return next(_VERSIONS)
 
-from .logs import getLogger
-logger = getLogger()
-
-def parser(*deco_args, **deco_kwargs):
-    def decorator(function):
-        deco_kwargs.setdefault("prog", function.__name__)
-        parser = argparse.ArgumentParser(*deco_args, **deco_kwargs)
-        parser._print_message = lambda *args: None
-
-        _args = getattr(function, "_args", [])
-        for args, kwargs in _args:
-            parser.add_argument(*args, **kwargs)
-
-        desc = "\n".join(["\u200b" + line for line in \
-                parser.format_help().split("\n")])
-
-        async def wrapper(ctx, *args):
-            try:
-                parsed = parser.parse_args(args)
-            except (argparse.ArgumentError, SystemExit):
-                embed = discord.Embed(
-                        title="Command Help",
-                        description=desc,
-                        color=DEFAULT_COLOR
-                )
-
-                await ctx.send(embed=embed)
-                return
-
-            return await function(ctx, parsed)
-        wrapper.__name__ = function.__name__
-        return wrapper
-    return decorator
-
-def option(*args, **kwargs):
-    def decorator(function):
-        if not hasattr(function, "_args"):
-            setattr(function, "_args", [])
-
-        _args = getattr(function, "_args")
-        _args.insert(0, (args, kwargs))
-        return function
-    return decorator
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
 
-# Takes all values and concatenates them to a string
-class ActionStatement(argparse.Action):
-    def __call__(self, parser, namespace, values, option_string=None):
-        setattr(namespace, self.dest, " ".join(values))
+    if chunk:
+        yield chunk
 
 def partition(pred, iterable):
     trues = []
@@ -62,3 +30,103 @@ def partition(pred, iterable):
         else:
             falses.append(item)
     return trues, falses
+
+class RingBuffer:
+    '''
+    Holds the most recent capacity values in an array of a single type code,
+    overwriting the oldest once full. Appending is O(1) and never allocates.
+    '''
+
+    def __init__(self, typecode, capacity):
+        self._data = array(typecode, [0]) * capacity
+        self._start = 0
+        self._len = 0
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    def append(self, value):
+        if self._len < len(self._data):
+            self._data[(self._start + self._len) % len(self._data)] = value
+            self._len += 1
+        else:
+            self._data[self._start] = value
+            self._start = (self._start + 1) % len(self._data)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("ring buffer index out of range")
+
+        return self._data[(self._start + i) % len(self._data)]
+
+    # Oldest first.
+    def __iter__(self):
+        for i in range(self._len):
+            yield self._data[(self._start + i) % len(self._data)]
+
+    def tobytes(self) -> bytes:
+        return array(self._data.typecode, self).tobytes()
+
+    '''
+    Rebuilds a buffer from tobytes(), keeping only the newest values if there
+    are more than fit.
+    '''
+    @classmethod
+    def frombytes(cls, typecode, capacity, data):
+        self = cls(typecode, capacity)
+
+        values = array(typecode)
+        values.frombytes(data)
+        for value in values[-capacity:]:
+            self.append(value)
+
+        return self
+
+class BitRing:
+    '''
+    Holds the most recent capacity bits packed into a single int, the newest
+    in the lowest bit.
+    '''
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.bits = 0
+        self.count = 0
+
+        self._mask = (1 << capacity) - 1
+
+    def append(self, bit):
+        self.bits = ((self.bits << 1) | bool(bit)) & self._mask
+        self.count = min(self.count + 1, self.capacity)
+
+    def __len__(self):
+        return self.count
+
+    # Oldest first.
+    def __iter__(self):
+        for i in reversed(range(self.count)):
+            yield (self.bits >> i) & 1
+
+    '''
+    Returns the newest bit and how many times in a row it came up, or
+    (None, 0) when empty.
+    '''
+    def streak(self):
+        if not self.count:
+            return None, 0
+
+        last = self.bits & 1
+
+        # Flip the bits so the run ends at the first set bit.
+        differ = (self.bits ^ -last) & ((1 << self.count) - 1)
+        if not differ:
+            return last, self.count
+
+        return last, (differ & -differ).bit_length() - 1
+
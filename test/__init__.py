@@ -1 +1,20 @@
-from .closest_wins import TestClosestWins
\ No newline at end of file
+from .archive import TestArchive
+from .bet_ids import TestBetIds
+from .cache import TestEmbedCache
+from .channels import TestChannels
+from .closest_wins import TestClosestWins
+from .export import TestExport
+from .help import TestHelp
+from .history import TestHistory
+from .invariant import TestInvariant
+from .ledger import TestLedger
+from .limits import TestRateLimiter
+from .maintenance import TestMaintenance
+from .parimutuel import TestParimutuel
+from .preview import TestPreview
+from .reactions import TestReactions
+from .replay import TestReplay
+from .replica import TestReplica
+from .season import TestSeason
+from .settle import TestSettle
+from .virtual import TestVirtualPlayers
\ No newline at end of file
@@ -0,0 +1,47 @@
+import unittest
+
+from gooble import House
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        # Create a House with a couple of players on an open bet.
+        self.house = House("123")
+        self.house.tracker.strict = True
+
+        self.house.getPlayer("Player1", 100)
+        self.house.getPlayer("Player2", 100)
+
+        players = self.house.players
+        self.bet = self.house.newBet("cw", "This is a test bet!", timeout=1)
+        self.bet.addPlayer(players["Player1"], 30, 10)
+        self.bet.addPlayer(players["Player2"], 40, 20)
+
+    def test_remove_refunds(self):
+        departed = self.house.removePlayers(["Player1", "Player3"])
+
+        self.assertEqual([ p.id for p in departed ], ["Player1"])
+        self.assertNotIn("Player1", self.house.players)
+        self.assertEqual(self.house.archived["Player1"]["balance"], 100)
+        self.assertEqual([ p.id for p, *_ in self.bet.getStakes() ],
+                ["Player2"])
+        self.assertTrue(self.house.audit())
+
+    def test_restore(self):
+        self.house.removePlayers(["Player2"])
+
+        player = self.house.getPlayer("Player2")
+        self.assertEqual(player.balance, 100)
+        self.assertNotIn("Player2", self.house.archived)
+        self.assertTrue(self.house.audit())
+
+    def test_json(self):
+        self.house.removePlayers(["Player2"])
+
+        house = House.fromJSON(self.house.json)
+        self.assertIn("Player2", house.archived)
+        self.assertNotIn("Player2", house.players)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from gooble import House
+from gooble.bet import encodeBetId
+from gooble.house import HouseException
+
+class TestBetIds(unittest.TestCase):
+
+    def setUp(self):
+        self.house = House("123")
+
+    def test_encode(self):
+        self.assertEqual(encodeBetId(0), "0")
+        self.assertEqual(encodeBetId(35), "z")
+        self.assertEqual(encodeBetId(36), "10")
+
+    def test_unique(self):
+        ids = { self.house.newBet("yn", "Bet {}".format(i)).id
+                for i in range(100) }
+        self.assertEqual(len(ids), 100)
+
+        # Ids keep counting after bets close and across a reload.
+        self.house.cancelBet(None)
+        house = House.fromJSON(self.house.json)
+        self.assertNotIn(house.newBet("yn", "Another bet").id, ids)
+
+    def test_prefix(self):
+        for i in range(40):
+            self.house.newBet("yn", "Bet {}".format(i))
+
+        # "1" is a whole id, so it wins over the ids it prefixes.
+        self.assertEqual(self.house.getBet("1").id, "1")
+        self.assertEqual(self.house.getBet("Z").id, "z")
+
+        # Without it, "1" is a prefix of "10" through "14".
+        self.house.cancelBet("1")
+        with self.assertRaises(HouseException):
+            self.house.getBet("1")
+
+        for betid in ("10", "11", "12", "13"):
+            self.house.cancelBet(betid)
+        self.assertEqual(self.house.getBet("1").id, "14")
+
+        with self.assertRaises(HouseException):
+            self.house.getBet("nope")
+
+
+if __name__ == '__main__':
+    unittest.main()
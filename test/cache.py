@@ -0,0 +1,68 @@
+import unittest
+
+import discord
+
+from gooble import House
+from gooble.cache import EmbedCache
+
+class TestEmbedCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = EmbedCache(maxsize=2)
+
+    def test_tags(self):
+        self.cache.put("a", 1, discord.Embed(title="A"))
+
+        self.assertEqual(self.cache.get("a", 1).title, "A")
+        self.assertIsNone(self.cache.get("a", 2))
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.hit_rate, 50)
+
+    def test_lru(self):
+        self.cache.put("a", 1, discord.Embed(title="A"))
+        self.cache.put("b", 1, discord.Embed(title="B"))
+        self.cache.get("a", 1)
+        self.cache.put("c", 1, discord.Embed(title="C"))
+
+        self.assertIsNone(self.cache.get("b", 1))
+        self.assertIsNotNone(self.cache.get("a", 1))
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_versions(self):
+        house = House("123")
+        player = house.getPlayer("Player1", 100)
+        bet = house.newBet("ou", "This is a test bet!")
+
+        versions = (house.version, player.version, bet.version)
+        bet.addPlayer(player, 10, "over")
+
+        self.assertNotEqual(house.version, versions[0])
+        self.assertNotEqual(player.version, versions[1])
+        self.assertNotEqual(bet.version, versions[2])
+
+    def test_replaced_player(self):
+        house = House("123")
+        house.getPlayer("Player1", 500)
+        house.getPlayer("Player2", 700)
+
+        # Someone's stats are cached, then a new season replaces the player
+        # with a fresh one at the default balance.
+        tag = house.getPlayer("Player1").version
+        house.newSeason()
+        player = house.getPlayer("Player1")
+
+        self.assertEqual(player.balance, 1000)
+        self.assertNotEqual(player.version, tag)
+
+        # Untouched and reloaded players don't share versions either.
+        loaded = House.fromJSON(house.json)
+        versions = { house.getPlayer("Player3").version,
+                house.getPlayer("Player4").version, player.version,
+                loaded.getPlayer("Player1").version, house.version,
+                loaded.version }
+        self.assertEqual(len(versions), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
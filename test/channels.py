@@ -0,0 +1,53 @@
+import unittest
+
+from gooble import House
+from gooble.house import HouseException
+
+class TestChannels(unittest.TestCase):
+
+    def setUp(self):
+        self.house = House("123")
+        self.house.tracker.strict = True
+
+        self.p1 = self.house.getPlayer("Player1", 100)
+        self.p2 = self.house.getPlayer("Player2", 100)
+
+        self.a1 = self.house.newBet("ou", "First in A", channel=1)
+        self.b1 = self.house.newBet("ou", "First in B", channel=2)
+        self.a2 = self.house.newBet("yn", "Second in A", channel=1)
+
+    def test_default_per_channel(self):
+        self.assertIs(self.house.getBet(None, 1), self.a2)
+        self.assertIs(self.house.getBet(None, 2), self.b1)
+        self.assertEqual(self.house.betsIn(1), [self.a1, self.a2])
+
+        # Ids still work from anywhere.
+        self.assertIs(self.house.getBet(self.b1.id, 1), self.b1)
+
+        with self.assertRaises(HouseException):
+            self.house.getBet(None, 3)
+        with self.assertRaises(HouseException):
+            self.house.getBet(None)
+
+    def test_independent_channels(self):
+        self.a2.addPlayer(self.p1, 10, "yes")
+        self.a2.addPlayer(self.p2, 10, "no")
+
+        # A new bet in B doesn't hijack A's default.
+        self.house.newBet("ou", "Second in B", channel=2)
+        self.house.endBet(None, "yes", channel=1)
+
+        self.assertEqual(self.p1.balance, 110)
+        self.assertIs(self.house.runningIn(1), self.a1)
+        self.assertEqual(self.house.runningIn(2).statement, "Second in B")
+
+        self.house.cancelBet(None, channel=1)
+        self.assertIsNone(self.house.runningIn(1))
+        self.assertNotIn(1, self.house.channels)
+        self.assertTrue(self.house.audit())
+
+    def test_no_channel(self):
+        bet = self.house.newBet("cw", "Nowhere in particular")
+        self.assertIs(self.house.running, bet)
+        self.assertIs(self.house.getBet(None), bet)
+        self.assertIs(self.house.getBet(None, 1), self.a2)
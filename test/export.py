@@ -0,0 +1,117 @@
+import os
+import csv
+import json
+import shelve
+import shutil
+import tempfile
+import unittest
+import contextlib
+import io
+
+from gooble import House
+from gooble.export import ShardedWriter, bets, export, main, players, \
+        transactions
+from gooble.ledger import Ledger
+from gooble.storage import LEGACY_KEY, iterHouses, saveHouses
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.ledger = Ledger(os.path.join(self.path, "ledger"),
+                segment_records=4)
+
+        self.houses = [ House(1), House(2) ]
+        for house in self.houses:
+            house.ledger = self.ledger
+            house.getPlayer(10, 100)
+            house.getPlayer(20, 200)
+
+        bet = self.houses[0].newBet("ou", "A test bet")
+        bet.addPlayer(self.houses[0].players[10], 50, "over")
+        bet.addPlayer(self.houses[0].players[20], 50, "under")
+        self.houses[0].endBet(bet.id, "over")
+
+        self.houses[1].transferFunds(self.houses[1].players[10], 25,
+                self.houses[1].players[20])
+
+    def tearDown(self):
+        self.ledger.close()
+        shutil.rmtree(self.path)
+
+    def test_storage(self):
+        with shelve.open(os.path.join(self.path, "db")) as db:
+            db[LEGACY_KEY] = [ self.houses[0].json ]
+            self.assertEqual(len(list(iterHouses(db))), 1)
+
+            saveHouses(db, self.houses)
+            self.assertNotIn(LEGACY_KEY, db)
+            self.assertEqual([ h["id"] for h in iterHouses(db, [2]) ], [2])
+
+            rows = list(players(db))
+            self.assertEqual(len(rows), 4)
+
+    def test_bets(self):
+        house = self.houses[1]
+        bet = house.newBet("pm", "Who wins?", outcomes=["Red", "Blue"],
+                channel=77)
+        bet.addPlayer(house.players[10], 30, "red")
+        bet.addPlayer(house.players[20], 15, "blue")
+        house.newBet("ou", "Over 10?")
+
+        with shelve.open(os.path.join(self.path, "db")) as db:
+            saveHouses(db, self.houses)
+
+            rows = list(bets(db, games={bet.GAME_TYPE.value}))
+            self.assertEqual(len(rows), 1)
+            self.assertEqual({ k: v for k, v in rows[0].items()
+                    if k != "created" }, {
+                "house": 2, "id": bet.id, "type": "PARIMUTUEL",
+                "statement": "Who wins?", "channel": 77, "stakes": 45
+            })
+            self.assertEqual(len(list(bets(db))), 2)
+            self.assertEqual(list(bets(db, houses=[1])), [])
+
+    def test_missing_db(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), \
+                self.assertRaises(SystemExit):
+            main(["bets", "--db", os.path.join(self.path, "nope")])
+        self.assertIn("could not open", stderr.getvalue())
+
+    def test_transactions(self):
+        rows = list(transactions(self.ledger.path))
+        self.assertEqual(len(rows), len(self.ledger))
+
+        rows = list(transactions(self.ledger.path, games={0, 1, 2, 3}))
+        self.assertTrue(rows)
+        self.assertTrue(all(row["bet"] is not None for row in rows))
+
+        rows = list(transactions(self.ledger.path, houses=["2"]))
+        self.assertEqual([ row["type"] for row in rows ],
+                ["TRANSFER", "TRANSFER"])
+
+    def test_shards(self):
+        out = os.path.join(self.path, "tx.jsonl")
+        writer = ShardedWriter(out, None, fmt="jsonl", shard_size=3)
+        count = export(transactions(self.ledger.path), writer)
+
+        shards = sorted(name for name in os.listdir(self.path)
+                if name.startswith("tx-"))
+        self.assertEqual(len(shards), -(-count // 3))
+
+        lines = []
+        for name in shards:
+            with open(os.path.join(self.path, name)) as f:
+                lines.extend(json.loads(line) for line in f)
+        self.assertEqual(len(lines), count)
+
+    def test_csv(self):
+        out = os.path.join(self.path, "tx.csv")
+        fields = [ "time", "type", "house", "player", "bet", "game",
+                "amount", "balance" ]
+        count = export(transactions(self.ledger.path),
+                ShardedWriter(out, fields))
+
+        with open(out, newline="") as f:
+            self.assertEqual(len(list(csv.DictReader(f))), count)
@@ -0,0 +1,32 @@
+import unittest
+
+from gooble.botutil import HelpCommand, fieldValues
+from gooble.gooble import Gooble
+
+class _Help(HelpCommand):
+    clean_prefix = "$"
+
+class TestHelp(unittest.TestCase):
+
+    def test_field_limits(self):
+        commands = [ command for command in Gooble._gooble_commands
+                if not command.hidden ]
+        embed = _Help()._renderBot({ None: commands })
+
+        self.assertGreater(len(embed.fields), 1)
+        for field in embed.fields:
+            self.assertLessEqual(len(field.value), HelpCommand.FIELD_LIMIT)
+
+        # Every command is still listed, in order.
+        listed = "\n".join(field.value for field in embed.fields)
+        names = [ line.split()[0].strip("`$") for line in listed.split("\n") ]
+        self.assertEqual(names, sorted(command.name for command in commands))
+
+    def test_field_values(self):
+        lines = [ str(i) * 9 for i in range(10) ] + ["x" * 40]
+        values = fieldValues(lines, 30)
+
+        self.assertEqual(values[:2], ["\n".join(lines[:3]),
+                "\n".join(lines[3:6])])
+        self.assertEqual(values[-1], "x" * 30)
+        self.assertEqual(fieldValues([]), [])
@@ -0,0 +1,87 @@
+import unittest
+
+from gooble import House
+from gooble.history import PlayerHistory, sparkline
+from gooble.player import Player
+from gooble.util import BitRing, RingBuffer
+
+class TestHistory(unittest.TestCase):
+
+    def test_ring_buffer(self):
+        ring = RingBuffer("q", 3)
+        for value in range(5):
+            ring.append(value)
+
+        self.assertEqual(list(ring), [2, 3, 4])
+        self.assertEqual(ring[0], 2)
+        self.assertEqual(ring[-1], 4)
+        self.assertEqual(list(RingBuffer.frombytes("q", 2, ring.tobytes())),
+                [3, 4])
+
+    def test_streak(self):
+        bits = BitRing(8)
+        self.assertEqual(bits.streak(), (None, 0))
+
+        for bit in [1, 0, 0, 1, 1, 1]:
+            bits.append(bit)
+        self.assertEqual(bits.streak(), (1, 3))
+
+        bits.append(0)
+        self.assertEqual(bits.streak(), (0, 1))
+
+        for _ in range(10):
+            bits.append(1)
+        self.assertEqual(bits.streak(), (1, 8))
+        self.assertEqual(len(bits), 8)
+
+    def test_settlement(self):
+        house = House("123")
+        players = [ house.getPlayer(pid, 100) for pid in ("P1", "P2") ]
+
+        for result in ["over", "over", "under"]:
+            bet = house.newBet("ou", "This is a test bet!")
+            bet.addPlayer(players[0], 10, "over")
+            bet.addPlayer(players[1], 10, "under")
+            house.endBet(bet.id, result)
+
+        history = players[0].history
+        self.assertEqual(list(history.balances), [110, 120, 110])
+        self.assertEqual(history.recent(2), [1, 0])
+        self.assertEqual(history.streak(), (0, 1))
+        self.assertEqual(players[1].history.streak(), (1, 1))
+
+    def test_window(self):
+        history = PlayerHistory(capacity=4)
+        for day in range(6):
+            history.record(day % 2, 100 + day, when=day * 86400)
+
+        self.assertEqual(len(history), 4)
+        self.assertEqual([ b for _, b in history.balancesSince(3 * 86400) ],
+                [103, 104, 105])
+        self.assertEqual(history.balancesSince(10 * 86400), [])
+
+    def test_persist(self):
+        player = Player("P1", 100)
+        for won in [True, True, False, True]:
+            if won:
+                player.add_win()
+            else:
+                player.add_loss()
+
+        restored = Player.fromJSON(player.json)
+        self.assertEqual(list(restored.history.balances),
+                list(player.history.balances))
+        self.assertEqual(list(restored.history.times),
+                list(player.history.times))
+        self.assertEqual(restored.history.recent(10), [1, 1, 0, 1])
+
+        # A smaller capacity keeps the newest results.
+        smaller = PlayerHistory.frombytes(player.history.tobytes(), capacity=2)
+        self.assertEqual(smaller.recent(10), [0, 1])
+
+        self.assertNotIn("history", Player("P2", 100).json)
+
+    def test_sparkline(self):
+        self.assertEqual(sparkline([]), "")
+        self.assertEqual(sparkline([1, 8, 4]), "▁█▄")
+        self.assertEqual(sparkline([5, 5]), "▁▁")
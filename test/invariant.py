@@ -0,0 +1,71 @@
+import unittest
+
+from gooble import House
+from gooble.audit import InvariantException
+from gooble.bet import Bet
+
+class TestInvariant(unittest.TestCase):
+
+    def setUp(self):
+        # Create a House that raises as soon as money goes missing.
+        self.house = House("123")
+        self.house.tracker.strict = True
+
+        self.house.getPlayer("Player1", 100)
+        self.house.getPlayer("Player2", 100)
+        self.house.getPlayer("Player3", 100)
+        self.house.getPlayer("Player4", 100)
+
+    def _total(self):
+        return sum(p.balance for p in self.house.players.values()) + \
+                self.house.community_pool
+
+    def test_allocate_conserves(self):
+        self.assertEqual(Bet._allocate(10, [1, 1, 1]), [4, 3, 3])
+        self.assertEqual(Bet._allocate(100, [7, 13, 29]), [14, 27, 59])
+        self.assertEqual(Bet._allocate(5, [0, 0]), [0, 0])
+
+    def test_uneven_payout(self):
+        players = self.house.players
+        bet = self.house.newBet("yn", "This is a test bet!")
+
+        bet.addPlayer(players["Player1"], 7, "yes")
+        bet.addPlayer(players["Player2"], 13, "yes")
+        bet.addPlayer(players["Player3"], 29, "yes")
+        bet.addPlayer(players["Player4"], 100, "no")
+
+        # Would have destroyed 2 with truncated payouts.
+        self.house.endBet(bet.id, "yes")
+        self.assertEqual(self._total(), 400)
+        self.assertTrue(self.house.audit())
+
+    def test_house_take(self):
+        players = self.house.players
+        bet = self.house.newBet("wl", "This is a test bet!")
+
+        bet.addPlayer(players["Player1"], 40, "lose")
+        self.house.endBet(bet.id, "win")
+
+        self.assertEqual(self.house.community_pool, 40)
+        self.assertTrue(self.house.verify())
+
+    def test_detects_drift(self):
+        players = self.house.players
+        players["Player1"].balance += 5
+
+        with self.assertRaises(InvariantException):
+            self.house.audit()
+
+    def test_reports_without_raising(self):
+        self.house.tracker.strict = False
+        self.house.community_pool += 5
+
+        with self.assertLogs("gooble", level="ERROR"):
+            self.assertFalse(self.house.verify())
+
+        # Drift is only reported once.
+        self.assertTrue(self.house.verify())
+
+
+if __name__ == '__main__':
+    unittest.main()
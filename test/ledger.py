@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+import unittest
+
+from gooble import House
+from gooble.ledger import EntryTypes, HOUSE_ACCOUNT, Ledger
+
+class TestLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+        # Use tiny segments so the tests cross segment boundaries.
+        self.ledger = Ledger(self.path, segment_records=4)
+
+        self.house = House(123)
+        self.house.ledger = self.ledger
+
+        self.house.getPlayer(1, 100)
+        self.house.getPlayer(2, 500)
+
+    def tearDown(self):
+        self.ledger.close()
+        shutil.rmtree(self.path)
+
+    def test_bet_entries(self):
+        players = self.house.players
+        bet = self.house.newBet("ou", "This is a test bet!")
+
+        bet.addPlayer(players[1], 50, "over")
+        bet.addPlayer(players[2], 100, "under")
+        bet.addPlayer(players[2], 150, "under")
+        self.house.endBet(bet.id, "under")
+
+        entries = self.ledger.last(123, 2, 10)
+        self.assertEqual([ e.type for e in entries ], [
+            EntryTypes.PAYOUT, EntryTypes.STAKE,
+            EntryTypes.REFUND, EntryTypes.STAKE
+        ])
+        self.assertEqual(entries[0].amount, 200)
+        self.assertEqual(entries[0].balance, 550)
+        self.assertEqual(entries[0].bet, bet.id)
+
+        self.assertEqual(len(self.ledger.last(123, 1, 1)), 1)
+
+        # Asking for nothing gets nothing, not everything.
+        self.assertEqual(self.ledger.last(123, 2, 0), [])
+        self.assertEqual(self.ledger.last(123, 2, -1), [])
+
+    def test_balance_at(self):
+        players = self.house.players
+        players[1].take(10)
+        middle = self.ledger.last(123, 1, 1)[0].timestamp
+        players[1].grant(30)
+
+        self.assertEqual(self.ledger.balanceAt(123, 1, middle), 90)
+        self.assertEqual(self.ledger.balanceAt(123, 1, middle - 1), 100)
+        self.assertEqual(self.ledger.balanceAt(123, 1, middle + 3600), 120)
+        self.assertIsNone(self.ledger.balanceAt(123, 3, middle))
+
+    def test_reload(self):
+        players = self.house.players
+        for _ in range(5):
+            self.house.transferFunds(players[2], 10, players[1])
+        self.house.transferFunds(players[2], 10)
+        self.ledger.close()
+
+        ledger = Ledger(self.path, segment_records=4)
+        self.assertEqual(len(ledger), 12)
+        self.assertEqual(ledger.last(123, 1, 1)[0].balance, 150)
+        self.assertEqual(ledger.last(123, HOUSE_ACCOUNT, 1)[0].balance, 10)
+        ledger.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
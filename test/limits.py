@@ -0,0 +1,66 @@
+import unittest
+
+from gooble import House
+from gooble.limits import EXPENSIVE, RateLimited, RateLimiter
+
+class TestRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.limiter = RateLimiter(player_rate=1, player_burst=5,
+                house_rate=10, house_burst=8)
+
+    def test_player_bucket(self):
+        for _ in range(5):
+            self.limiter.check("Player1", 1, now=0)
+
+        with self.assertRaises(RateLimited) as cm:
+            self.limiter.check("Player1", 1, now=0)
+        self.assertTrue(cm.exception.notify)
+        self.assertEqual(cm.exception.retry_after, 1)
+
+        # Later rejections in the same window are coalesced.
+        with self.assertRaises(RateLimited) as cm:
+            self.limiter.check("Player1", 1, now=0.5)
+        self.assertFalse(cm.exception.notify)
+
+        # Tokens come back over time and other players are unaffected.
+        self.limiter.check("Player1", 1, now=1)
+        self.limiter.check("Player2", 1, now=1)
+
+    def test_house_bucket(self):
+        self.limiter.check("Player1", 5, now=0)
+
+        # The house only has 3 tokens left, so nothing is charged.
+        with self.assertRaises(RateLimited):
+            self.limiter.check("Player2", 5, now=0)
+
+        self.limiter.check("Player2", 3, now=0)
+
+    def test_configure(self):
+        with self.assertRaises(ValueError):
+            self.limiter.configure(bogus=1)
+
+        self.limiter.configure(player_burst=EXPENSIVE)
+        self.assertEqual(self.limiter.limits["player_rate"], 0.5)
+
+        self.limiter.check("Player1", EXPENSIVE, now=0)
+        with self.assertRaises(RateLimited):
+            self.limiter.check("Player1", 1, now=0)
+
+    def test_unusable_limits(self):
+        # Buckets that never refill or can't hold an expensive command.
+        for limits in ({ "player_rate": 0 }, { "house_rate": -1 },
+                { "player_burst": EXPENSIVE - 1 }, { "house_burst": 0 }):
+            with self.assertRaises(ValueError):
+                self.limiter.configure(**limits)
+
+        # The old limits are kept.
+        self.assertEqual(self.limiter.limits["player_burst"], 5)
+
+    def test_unusable_saved_limits(self):
+        house = House.fromJSON({ "id": 1, "limits": { "player_burst": 3 } })
+        self.assertEqual(house.limiter.limits, RateLimiter.DEFAULTS)
+
+
+if __name__ == '__main__':
+    unittest.main()
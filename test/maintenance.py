@@ -0,0 +1,132 @@
+import io
+import os
+import shelve
+import shutil
+import tempfile
+import unittest
+from functools import partial
+from multiprocessing import Manager
+
+from gooble import House
+from gooble.export import bets, parallelBets, parallelPlayers, \
+        parallelTransactions, players, progressReporter, transactions
+from gooble.ledger import Ledger
+from gooble.maintenance import MaintenanceExecutor
+from gooble.storage import saveHouses
+
+def totalBalance(houseDict):
+    if houseDict["id"] == 13:
+        raise ValueError("unlucky house")
+    return sum(p["balance"] for p in houseDict["players"])
+
+def blockedFirst(released, i):
+    if i == 0:
+        released.wait()
+    return b"x" * 1000
+
+class TestMaintenance(unittest.TestCase):
+
+    def setUp(self):
+        self.houses = []
+        for hid in range(1, 9):
+            house = House(hid)
+            for pid in range(1, 6):
+                house.getPlayer(pid, hid * pid)
+            self.houses.append(house)
+
+        self.executor = MaintenanceExecutor(2)
+
+    def tearDown(self):
+        self.executor.close()
+
+    def test_imap(self):
+        self.houses.insert(3, House(13))
+        items = [ (house.id, house.json) for house in self.houses ]
+
+        progress = []
+        results = list(self.executor.imap(totalBalance, items,
+                progress=lambda done, total: progress.append((done, total)),
+                total=len(items)))
+
+        # Results come back in order, with failures in their place.
+        self.assertEqual([ key for key, _, _ in results ],
+                [ house.id for house in self.houses ])
+        self.assertEqual({ key: result for key, result, error in results
+                if error is None }, { hid: hid * 15 for hid in range(1, 9) })
+        self.assertIsInstance(results[3][2], ValueError)
+        self.assertEqual(progress[-1], (9, 9))
+
+    def test_budget(self):
+        # A budget smaller than any house still makes progress.
+        executor = MaintenanceExecutor(2, memory_budget=1)
+        try:
+            results = list(executor.imap(totalBalance,
+                    ((house.id, house.json) for house in self.houses)))
+        finally:
+            executor.close()
+
+        self.assertEqual(len(results), 8)
+
+    def test_budget_counts_held_results(self):
+        pulled = []
+        def items():
+            for i in range(50):
+                pulled.append(i)
+                yield i, i
+
+        # The first item is held up until three later ones have finished, so
+        # there are always results waiting for it. They count against the
+        # budget until they're handed back.
+        executor = MaintenanceExecutor(2, memory_budget=3000)
+        with Manager() as manager:
+            released = manager.Event()
+            def progress(done, total):
+                if done == 3:
+                    released.set()
+
+            try:
+                results = executor.imap(partial(blockedFirst, released),
+                        items(), progress=progress)
+                self.assertEqual(next(results)[0], 0)
+                self.assertLess(len(pulled), 10)
+                self.assertEqual([ key for key, _, _ in results ],
+                        list(range(1, 50)))
+            finally:
+                executor.close()
+
+    def test_parallel_export(self):
+        path = tempfile.mkdtemp()
+        try:
+            ledger = Ledger(os.path.join(path, "ledger"), segment_records=3)
+            for house in self.houses:
+                house.ledger = ledger
+                house.transferFunds(house.players[5], 2, house.players[1])
+            ledger.close()
+
+            self.assertEqual(
+                    list(parallelTransactions(self.executor, ledger.path)),
+                    list(transactions(ledger.path)))
+            self.assertEqual(
+                    list(parallelTransactions(self.executor, ledger.path,
+                    houses=["3"])),
+                    list(transactions(ledger.path, houses=["3"])))
+
+            for house in self.houses[::3]:
+                house.newBet("ou", "Over 10?")
+
+            with shelve.open(os.path.join(path, "db")) as db:
+                saveHouses(db, self.houses)
+                self.assertEqual(list(parallelPlayers(self.executor, db)),
+                        list(players(db)))
+                self.assertEqual(list(parallelBets(self.executor, db)),
+                        list(bets(db)))
+
+            # Progress counts segments out of the total.
+            out = io.StringIO()
+            list(parallelTransactions(self.executor, ledger.path,
+                    progress=progressReporter("segments", file=out)))
+            segments = len(Ledger._segments(ledger.path))
+            self.assertTrue(out.getvalue().endswith("\r{0}/{0} segments done"
+                    .format(segments)))
+        finally:
+            shutil.rmtree(path)
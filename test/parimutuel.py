@@ -0,0 +1,97 @@
+import unittest
+
+from gooble import House
+from gooble.bet import BetException
+
+class TestParimutuel(unittest.TestCase):
+
+    def setUp(self):
+        self.house = House("123")
+        self.house.tracker.strict = True
+
+        self.players = [ self.house.getPlayer("Player{}".format(i), 100)
+                for i in range(1, 5) ]
+
+        self.bet = self.house.newBet("pm", "Which team wins?",
+                outcomes=["Red", "Blue", "Green"])
+
+    def test_needs_outcomes(self):
+        with self.assertRaises(BetException):
+            self.house.newBet("pm", "Only one?", outcomes=["Red"])
+        with self.assertRaises(BetException):
+            self.house.newBet("pm", "Twice?", outcomes=["Red", "red"])
+        with self.assertRaises(BetException):
+            self.house.newBet("ou", "Binary", outcomes=["Red", "Blue"])
+
+    def test_pools(self):
+        p1, p2, p3, p4 = self.players
+        self.bet.addPlayer(p1, 10, "red")
+        self.bet.addPlayer(p2, 30, "2")
+        self.bet.addPlayer(p3, 20, "Blue")
+        self.bet.addPlayer(p4, 40, "red")
+
+        # Switching outcome moves the stake.
+        self.bet.addPlayer(p4, 50, "green")
+
+        self.assertEqual(self.bet.totals, [10, 50, 50])
+        self.assertEqual(self.bet.total, 110)
+        self.assertEqual(p4.balance, 50)
+        self.assertEqual(self.bet.odds(), [
+            ("Red", 10, 11.0), ("Blue", 50, 2.2), ("Green", 50, 2.2)])
+
+        with self.assertRaises(BetException):
+            self.bet.addPlayer(p1, 10, "purple")
+
+    def test_settle(self):
+        p1, p2, p3, p4 = self.players
+        self.bet.addPlayer(p1, 10, "red")
+        self.bet.addPlayer(p2, 30, "blue")
+        self.bet.addPlayer(p3, 20, "blue")
+        self.bet.addPlayer(p4, 40, "green")
+
+        self.assertEqual(self.bet.preview(p2, 30, "blue"),
+                [("Blue", 30), ("any other outcome", -30)])
+
+        # Only the winners are settled right away.
+        _, deltas = self.house.endBet(self.bet.id, "blue")
+        self.assertEqual(sorted((p.id, d) for p, d in deltas), [
+            ("Player2", 30), ("Player3", 20)])
+        self.assertEqual([ p.balance for p in self.players ],
+                [90, 130, 120, 60])
+        self.assertEqual(p2.wins, 1)
+        self.assertEqual(p4.losses, 0)
+
+        # The losses are counted before anyone looks.
+        self.assertEqual(self.house.getPlayer("Player4").losses, 1)
+        self.assertEqual(p1.losses, 1)
+        self.assertEqual(p2.losses, 0)
+        self.assertEqual(self.house._losses, [])
+        self.assertTrue(self.house.audit())
+
+    def test_losses_before_changes(self):
+        p1, p2 = self.players[:2]
+        self.bet.addPlayer(p1, 10, "red")
+        self.bet.addPlayer(p2, 30, "blue")
+        self.house.endBet(self.bet.id, "blue")
+
+        # A loser's own next change counts the loss first, and only once.
+        p1.grant(5)
+        self.assertEqual(p1.losses, 1)
+        house = House.fromJSON(self.house.json)
+        self.assertEqual(house.players["Player1"].losses, 1)
+        self.assertEqual(p1.losses, 1)
+
+    def test_no_winners(self):
+        self.bet.addPlayer(self.players[0], 10, "red")
+        self.house.endBet(self.bet.id, "green")
+
+        self.assertEqual(self.house.community_pool, 10)
+        self.assertTrue(self.house.audit())
+
+    def test_cancel(self):
+        self.bet.addPlayer(self.players[0], 10, "red")
+        self.bet.addPlayer(self.players[1], 20, "blue")
+        self.house.cancelBet(self.bet.id)
+
+        self.assertEqual([ p.balance for p in self.players ], [100] * 4)
+        self.assertTrue(self.house.audit())
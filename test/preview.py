@@ -0,0 +1,60 @@
+import unittest
+
+from gooble import House
+
+class TestPreview(unittest.TestCase):
+
+    def setUp(self):
+        # Create a House and some players.
+        self.house = House("123")
+
+        self.house.getPlayer("Player1", 100)
+        self.house.getPlayer("Player2", 500)
+        self.house.getPlayer("Player3", 250)
+
+    def test_binary_preview(self):
+        bet = self.house.newBet("ou", "This is a test bet!")
+        players = self.house.players
+
+        bet.addPlayer(players["Player1"], 50, "over")
+        bet.addPlayer(players["Player2"], 150, "under")
+
+        outcomes = dict(bet.preview(players["Player3"], 100, "over"))
+
+        # Player3 would own two thirds of the winning pool.
+        self.assertEqual(outcomes["over"], 100)
+        self.assertEqual(outcomes["under"], -100)
+
+        # Previewing does not touch any balances.
+        self.assertEqual(players["Player3"].balance, 250)
+
+    def test_binary_preview_replaces_stake(self):
+        bet = self.house.newBet("ou", "This is a test bet!")
+        players = self.house.players
+
+        bet.addPlayer(players["Player1"], 50, "over")
+        bet.addPlayer(players["Player2"], 150, "under")
+
+        # Switching sides should not count the existing stake.
+        outcomes = dict(bet.preview(players["Player1"], 50, "under"))
+        self.assertEqual(outcomes["under"], 0)
+        self.assertEqual(outcomes["over"], -50)
+
+    def test_preview_matches_payout(self):
+        bet = self.house.newBet("cw", "This is a test bet!")
+        players = self.house.players
+
+        bet.addPlayer(players["Player1"], 50, 20)
+        bet.addPlayer(players["Player2"], 150, 85)
+
+        outcomes = bet.preview(players["Player3"], 200, 37)
+        self.assertEqual(outcomes[0], ("29 to 60", 200))
+        self.assertEqual(outcomes[1], ("otherwise", -200))
+
+        bet.addPlayer(players["Player3"], 200, 37)
+        _, deltas = self.house.endBet(bet.id, 50)
+        self.assertIn((players["Player3"], 200), deltas)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+
+from gooble import House
+from gooble.bet import BetException
+from gooble.reactions import ReactionBatcher
+
+class TestReactions(unittest.TestCase):
+
+    def setUp(self):
+        # Create a House, some players and a reaction bet.
+        self.house = House("123")
+        self.house.tracker.strict = True
+
+        self.house.getPlayer("Player1", 100)
+        self.house.getPlayer("Player2", 100)
+        self.house.getPlayer("Player3", 10)
+
+        self.bet = self.house.newBet("yn", "This is a test bet!", stake=20)
+        self.house.bindMessage(self.bet, 42)
+
+        self.yes = self.bet.TRUTHY_EMOJI
+        self.no = self.bet.FALSEY_EMOJI
+
+    def test_non_binary(self):
+        with self.assertRaises(BetException):
+            self.house.newBet("cw", "This is a test bet!", stake=20)
+
+    def test_batch(self):
+        p1, p2, p3 = (self.house.players[pid]
+                for pid in ("Player1", "Player2", "Player3"))
+
+        failed = self.bet.applyReactions([
+            (p1, self.yes, True),
+            (p2, self.yes, True),
+            (p2, self.no, True),
+            (p2, self.yes, False),
+            (p3, self.no, True),
+            (p1, "\U0001f600", True),
+        ])
+
+        self.assertEqual(self.house.getBetByMessage(42), self.bet)
+        self.assertEqual(self.bet.wagerOf("Player1"), True)
+        self.assertEqual(self.bet.wagerOf("Player2"), False)
+
+        # Player3 can't cover the stake.
+        self.assertEqual([ p for p, _ in failed ], [p3])
+        self.assertEqual(p3.balance, 10)
+        self.assertEqual(p1.balance, 80)
+        self.assertEqual(p2.balance, 80)
+
+    def test_fixed_stake(self):
+        p1 = self.house.players["Player1"]
+
+        # Joining with a command still takes the fixed stake.
+        with self.assertRaises(BetException):
+            self.bet.addPlayer(p1, 50, "yes")
+        self.assertIsNone(self.bet.wagerOf("Player1"))
+
+        self.bet.addPlayer(p1, 20, "yes")
+        self.assertEqual(p1.balance, 80)
+
+    def test_removal_refunds(self):
+        p1 = self.house.players["Player1"]
+
+        self.bet.applyReactions([ (p1, self.yes, True) ])
+        self.bet.applyReactions([ (p1, self.yes, False), (p1, self.no, False) ])
+
+        self.assertIsNone(self.bet.wagerOf("Player1"))
+        self.assertEqual(p1.balance, 100)
+
+    def test_batcher_tasks(self):
+        flushed = []
+        async def flush(key, events):
+            flushed.append((key, events))
+
+        async def run():
+            batcher = ReactionBatcher(flush, window=0.01)
+            batcher.push(42, "a")
+            batcher.push(42, "b")
+
+            # The pending flush is held until it finishes.
+            self.assertEqual(len(batcher._tasks), 1)
+            await asyncio.sleep(0.05)
+            self.assertEqual(flushed, [(42, ["a", "b"])])
+            self.assertEqual(batcher._tasks, set())
+
+            # Closing flushes what's pending right away instead of dropping it.
+            batcher.window = 60
+            batcher.push(43, "c")
+            task, = batcher._tasks
+            await batcher.close()
+            self.assertTrue(task.cancelled())
+            self.assertEqual(flushed[1:], [(43, ["c"])])
+            self.assertEqual(batcher._pending, {})
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from gooble.replay import Replayer
+from gooble.trace import TraceRecorder, readTrace
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "guild.trace")
+
+        # Real ids are large; the trace should only carry small stand-ins.
+        guild, channel, alice, bob = 9001, 9002, 9003, 9004
+        rec = TraceRecorder(self.path)
+        rec.record("gift", guild, alice, channel,
+                [SimpleNamespace(id=bob), 50])
+        rec.record("bet", guild, alice, channel,
+                ["yn", "Rain?", None, None], bet="00ab")
+        rec.record("place", guild, alice, channel, [30, "yes", "00ab"])
+        rec.record("place", guild, bob, channel, [20, "no", None])
+        rec.record("reactbet", guild, alice, channel,
+                ["yn", "Snow?", 5, None], bet="00ac")
+        rec.record("react", guild, None, channel,
+                ["00ac", [[rec.anonymize("player", bob), "👍", True]]])
+        rec.record("payout", guild, alice, channel, ["maybe", "00ab"],
+                ok=False)
+        rec.record("payout", guild, alice, channel, ["yes", "00ab"])
+        rec.record("leaderboard", guild, alice, channel, [],
+                kwargs={ "type": "money" })
+        rec.close()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def replay(self):
+        header, records = readTrace(self.path)
+        replayer = Replayer()
+        replayer.run(records)
+        return replayer
+
+    def test_anonymized(self):
+        header, records = readTrace(self.path)
+        records = list(records)
+
+        self.assertEqual(records[0]["house"], 1)
+        self.assertEqual(records[0]["author"], 1)
+        self.assertEqual(records[0]["args"], [{ "player": 2 }, 50])
+        with open(self.path) as f:
+            self.assertNotIn("9003", f.read())
+
+    def test_replay(self):
+        replayer = self.replay()
+        report = replayer.report()
+
+        # Recorded bet ids are mapped to the ones the replay handed out.
+        house = replayer.houses[1]
+        alice, bob = house.getPlayer(1), house.getPlayer(2)
+        self.assertEqual(alice.wins, 1)
+        self.assertEqual(bob.losses, 1)
+        self.assertEqual(len(house.bets), 1)
+        self.assertEqual(len(list(house.bets.values())[0].getStakes()), 1)
+
+        self.assertEqual(report["commands"]["place"]["count"], 2)
+        self.assertEqual(report["commands"]["payout"]["errors"], 1)
+        self.assertEqual(sum(c["diverged"]
+                for c in report["commands"].values()), 0)
+
+    def test_deterministic(self):
+        first, second = self.replay().report(), self.replay().report()
+        self.assertEqual(first["houses"], second["houses"])
+        self.assertEqual(first["checksum"], second["checksum"])
+
+    def test_bet_ids(self):
+        rec = TraceRecorder(self.path)
+        rec.record("bet", 1, 1, 1, ["yn", "Rain?", None, None], bet="00ab")
+        rec.record("bet", 1, 1, 1, ["yn", "Snow?", None, None], bet="00b7")
+        rec.record("payout", 1, 1, 1, ["yes", "00b7"])
+
+        # A prefix of a recorded id, and ids the trace never saw created.
+        rec.record("place", 1, 1, 1, [10, "yes", "00"])
+        rec.record("place", 1, 2, 1, [10, "no", "1"])
+        rec.record("place", 1, 2, 1, [10, "no", "00c"])
+        rec.close()
+
+        replayer = self.replay()
+        house = replayer.houses[1]
+        stakes = house.bets["1"].getStakes()
+
+        self.assertEqual([ (p.id, stake) for p, stake, _ in stakes ],
+                [(1, 10)])
+        self.assertEqual(replayer.unmapped, { "place": 2 })
+        self.assertEqual(replayer.report()["commands"]["place"]["count"], 1)
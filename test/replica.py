@@ -0,0 +1,155 @@
+import os
+import time
+import threading
+import unittest
+from multiprocessing.connection import Listener
+
+from gooble import House
+from gooble.ledger import EntryTypes
+from gooble.replica import ChangeJournal, Follower, Primary, \
+        ReplicaException, authKey, checksum, follow, houseState, isLocal, \
+        parseAddress
+
+class TestReplica(unittest.TestCase):
+
+    def setUp(self):
+        self.journal = ChangeJournal()
+        self.follower = Follower()
+
+        self.house = House(123)
+        self.house.journal = self.journal
+        self.p1 = self.house.getPlayer(1, 100)
+        self.p2 = self.house.getPlayer(2, 100)
+
+        self.follower.apply([("house", 123, houseState(self.house))])
+        self.journal.clear()
+
+    def sync(self):
+        self.follower.apply(self.journal.drain())
+        return self.follower.compare({ 123: checksum(houseState(self.house)) })
+
+    def test_incremental(self):
+        bet = self.house.newBet("pm", "Who wins?", channel=5,
+                outcomes=["Red", "Blue"])
+        bet.addPlayer(self.p1, 40, "red")
+        self.assertEqual(self.sync(), [])
+
+        # Only the changed player and bet are shipped.
+        bet.addPlayer(self.p2, 10, "blue")
+        records = self.journal.drain()
+        self.assertEqual(sorted(r[0] for r in records),
+                ["bet", "meta", "player"])
+        self.follower.apply(records)
+
+        self.house.endBet(None, "blue", channel=5)
+        self.house.getPlayer(3).grant(5, EntryTypes.GIFT)
+        self.assertEqual(self.sync(), [])
+
+        self.house.removePlayers([1])
+        self.house.getPlayer(4)
+        self.assertEqual(self.sync(), [])
+        self.assertIn(1, self.follower.houses[123]["archived"])
+        self.assertNotIn(4, self.follower.houses[123]["players"])
+
+    def test_season_and_drop(self):
+        self.house.newSeason()
+        records = self.journal.drain()
+        self.assertEqual([ r[0] for r in records ], ["house"])
+        self.follower.apply(records)
+        self.assertEqual(self.sync(), [])
+
+        self.journal.dropHouse(123)
+        self.follower.apply(self.journal.drain())
+        self.assertEqual(self.follower.houses, {})
+
+    def test_mismatch(self):
+        self.p1.grant(5)
+        # Lose the change on the way.
+        self.journal.drain()
+
+        self.assertEqual(self.sync(), [123])
+
+    def test_takeover(self):
+        bet = self.house.newBet("ou", "Over or under?", channel=7)
+        bet.addPlayer(self.p1, 30, "over")
+        self.house.bindMessage(bet, 999)
+        self.sync()
+
+        house, = self.follower.toHouses()
+        self.assertEqual(checksum(houseState(house)),
+                checksum(houseState(self.house)))
+        self.assertTrue(house.audit())
+        self.assertIs(house.getBetByMessage(999), house.runningIn(7))
+
+        # The restored bet settles like the original would.
+        bet = house.runningIn(7)
+        bet.addPlayer(house.getPlayer(2), 30, "under")
+        house.endBet(bet.id, "over")
+        self.assertEqual(house.players[1].balance, 130)
+        self.assertTrue(house.audit())
+
+    def test_connection(self):
+        houses = { 123: self.house }
+        with Listener(("127.0.0.1", 0), authkey=b"test") as listener:
+            result = {}
+            thread = threading.Thread(target=lambda: result.update(
+                    follower=follow(listener)), daemon=True)
+            thread.start()
+
+            primary = Primary(listener.address, authkey=b"test")
+            primary.attach(self.house)
+            try:
+                deadline = time.time() + 5
+                while not primary.connected and time.time() < deadline:
+                    time.sleep(0.01)
+                self.assertTrue(primary.connected)
+
+                primary.flush(houses)
+
+                # Batches built for an earlier connection never reach this
+                # follower.
+                primary._enqueue(primary._generation - 1, "batch",
+                        [("house", 999, houseState(self.house))])
+
+                self.p1.grant(7)
+                primary.check(houses)
+
+                while primary.lag and time.time() < deadline:
+                    time.sleep(0.01)
+                self.assertEqual(primary.lag, 0)
+                self.assertEqual(primary.mismatches, 0)
+            finally:
+                # Drop the connection without a goodbye, like a crash.
+                primary._conn.close()
+                primary._queue.put(None)
+                primary._thread.join(5)
+
+            thread.join(5)
+            follower = result["follower"]
+            self.assertEqual(follower.houses[123]["players"][1]["balance"],
+                    107)
+            self.assertNotIn(999, follower.houses)
+
+    def test_auth_key(self):
+        saved = os.environ.pop("GOOBLE_REPLICA_KEY", None)
+        try:
+            # There is no default key to fall back to.
+            with self.assertRaises(ReplicaException):
+                authKey()
+            with self.assertRaises(ReplicaException):
+                Primary(("127.0.0.1", 1))
+
+            os.environ["GOOBLE_REPLICA_KEY"] = "secret"
+            self.assertEqual(authKey(), b"secret")
+        finally:
+            os.environ.pop("GOOBLE_REPLICA_KEY", None)
+            if saved is not None:
+                os.environ["GOOBLE_REPLICA_KEY"] = saved
+
+    def test_local_addresses(self):
+        self.assertTrue(isLocal(parseAddress(":6001")))
+        self.assertTrue(isLocal(parseAddress("127.0.0.1:6001")))
+        self.assertTrue(isLocal(parseAddress("localhost:6001")))
+        self.assertTrue(isLocal(parseAddress("/run/gooble.sock")))
+        self.assertFalse(isLocal(parseAddress("0.0.0.0:6001")))
+        self.assertFalse(isLocal(parseAddress("10.0.0.5:6001")))
@@ -0,0 +1,154 @@
+import shutil
+import tempfile
+import time
+import unittest
+
+from gooble import House
+from gooble.house import DEFAULT_STARTING_AMOUNT, HouseException
+from gooble.ledger import EntryTypes, HOUSE_ACCOUNT, Ledger
+from gooble.player import PlayerException
+from gooble.player import LeaderboardTypes
+
+class TestSeason(unittest.TestCase):
+
+    def setUp(self):
+        self.house = House("123")
+        self.house.tracker.strict = True
+
+        players = [ self.house.getPlayer(pid, 100) for pid in ("P1", "P2") ]
+
+        bet = self.house.newBet("ou", "This is a test bet!")
+        bet.addPlayer(players[0], 50, "over")
+        bet.addPlayer(players[1], 50, "under")
+        self.house.endBet(bet.id, "over")
+
+        # Left open over the rollover.
+        self.open = self.house.newBet("ou", "This one is still open")
+        self.open.addPlayer(players[1], 20, "over")
+
+    def test_rollover(self):
+        old = self.house.players
+        season = self.house.newSeason()
+
+        # The snapshot took the old players as they were.
+        self.assertIs(season._players, old)
+        self.assertEqual(season.players["P1"].balance, 150)
+        self.assertEqual(season.players["P2"].balance, 50)
+        self.assertEqual(season.players["P2"].losses, 1)
+
+        self.assertEqual(self.house.season, 2)
+        self.assertEqual(self.house.players, {})
+        self.assertEqual(self.house.bets, {})
+        self.assertIsNone(self.house.running)
+
+        player = self.house.getPlayer("P1")
+        self.assertEqual(player.balance, DEFAULT_STARTING_AMOUNT)
+        self.assertEqual(player.wins, 0)
+        self.assertTrue(self.house.audit())
+
+    def test_frozen(self):
+        old = self.house.players["P1"]
+        season = self.house.newSeason()
+
+        # Past players can't change, and never reach the live House.
+        with self.assertRaises(PlayerException):
+            old.grant(10)
+        with self.assertRaises(PlayerException):
+            old.add_win()
+        self.assertEqual(season.players["P1"].balance, 150)
+        self.assertEqual(season.players["P1"].wins, 1)
+        self.assertTrue(self.house.audit())
+
+        # Neither can loaded ones, nor players the House archived.
+        loaded = House.fromJSON(self.house.json).getSeason(1)
+        with self.assertRaises(PlayerException):
+            loaded.players["P1"].take(10)
+
+        archived = self.house.getPlayer("P3", 300)
+        self.house.removePlayers(["P3"])
+        with self.assertRaises(PlayerException):
+            archived.take(10)
+
+    def test_ledger(self):
+        path = tempfile.mkdtemp()
+        try:
+            house = House(7)
+            house.ledger = ledger = Ledger(path)
+            house.getPlayer(1, 100).grant(50)
+            house.transferFunds(house.getPlayer(2, 300), 20)
+            house.removePlayers([2])
+
+            before = time.time()
+            entries = len(ledger)
+            house.newSeason()
+            now = time.time()
+
+            # One entry for the whole house, whatever its size.
+            self.assertEqual(len(ledger), entries + 1)
+
+            # Balances from the ledger agree with the new season's.
+            for pid in (1, 2):
+                self.assertEqual(ledger.balanceAt(7, pid, now),
+                        DEFAULT_STARTING_AMOUNT)
+                self.assertIs(ledger.last(7, pid, 1)[0].type,
+                        EntryTypes.SEASON_RESET)
+            self.assertEqual(ledger.balanceAt(7, 1, before), 150)
+            self.assertEqual(ledger.balanceAt(7, HOUSE_ACCOUNT, now), 0)
+
+            # Resets show up in a player's history as they applied to them.
+            house.getPlayer(1).take(100)
+            house.newSeason()
+            entries = ledger.last(7, 1, 4)
+            self.assertEqual([ (e.type, e.amount, e.balance)
+                    for e in entries ], [
+                (EntryTypes.SEASON_RESET, 100, DEFAULT_STARTING_AMOUNT),
+                (EntryTypes.TAKE, -100, DEFAULT_STARTING_AMOUNT - 100),
+                (EntryTypes.SEASON_RESET, DEFAULT_STARTING_AMOUNT - 150,
+                    DEFAULT_STARTING_AMOUNT),
+                (EntryTypes.GRANT, 50, 150)
+            ])
+
+            # Players that only turned up later don't see older resets.
+            house.getPlayer(3).grant(5)
+            self.assertEqual(len(ledger.last(7, 3, 10)), 1)
+            self.assertEqual(ledger.last(7, 3, 0), [])
+            ledger.close()
+        finally:
+            shutil.rmtree(path)
+
+    def test_leaderboard(self):
+        season = self.house.newSeason()
+        self.house.getPlayer("P2").grant(1000)
+
+        self.assertIs(self.house.getSeason(1), season)
+        board = season.getLeaderboard(LeaderboardTypes.MONEY)
+        self.assertEqual([ (p.id, v) for p, v in board ],
+                [("P1", "150"), ("P2", "50")])
+
+        # The ranking is kept, not recomputed, and limits are exact.
+        ranking = season._rankings[LeaderboardTypes.MONEY]
+        self.assertEqual(len(season.getLeaderboard(LeaderboardTypes.MONEY, 1)),
+                1)
+        self.assertIs(season._rankings[LeaderboardTypes.MONEY], ranking)
+        self.assertEqual(len(self.house.getLeaderboard(LeaderboardTypes.MONEY,
+                1)), 1)
+
+    def test_unknown_season(self):
+        with self.assertRaises(HouseException):
+            self.house.getSeason(1)
+
+        self.house.newSeason()
+        with self.assertRaises(HouseException):
+            self.house.getSeason(2)
+        with self.assertRaises(HouseException):
+            self.house.getSeason(0)
+
+    def test_json(self):
+        self.house.newSeason()
+        self.house.getPlayer("P3", 300)
+
+        house = House.fromJSON(self.house.json)
+        self.assertEqual(house.season, 2)
+        self.assertEqual(house.getSeason(1).players["P1"].balance, 150)
+        self.assertEqual(house.players["P3"].balance, 300)
+        self.assertEqual(house.getSeason(1).json, self.house.getSeason(1).json)
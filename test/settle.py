@@ -0,0 +1,58 @@
+import unittest
+
+from gooble import House
+from gooble.bet import BetException
+from gooble.house import HouseException
+
+class TestSettle(unittest.TestCase):
+
+    def setUp(self):
+        # Create a House and some players.
+        self.house = House("123")
+
+        self.house.getPlayer("Player1", 100)
+        self.house.getPlayer("Player2", 500)
+
+        players = self.house.players
+
+        self.ou = self.house.newBet("ou", "Over/under test bet")
+        self.ou.addPlayer(players["Player1"], 50, "over")
+        self.ou.addPlayer(players["Player2"], 100, "under")
+
+        self.cw = self.house.newBet("cw", "Closest wins test bet")
+        self.cw.addPlayer(players["Player1"], 20, 10)
+        self.cw.addPlayer(players["Player2"], 40, 30)
+
+    def test_net_deltas(self):
+        bets, summary = self.house.endBets([
+            (self.ou.id, "over"),
+            (self.cw.id, "29"),
+        ])
+
+        self.assertEqual(bets, [self.ou, self.cw])
+
+        net = { player.id: delta for player, delta in summary }
+        self.assertEqual(net["Player1"], 100 - 20)
+        self.assertEqual(net["Player2"], -100 + 20)
+
+        # Settled bets are closed.
+        self.assertNotIn(self.ou.id, self.house.bets)
+        self.assertNotIn(self.cw.id, self.house.bets)
+
+    def test_validates_before_settling(self):
+        with self.assertRaises(BetException):
+            self.house.endBets([(self.ou.id, "over"), (self.cw.id, "nope")])
+
+        with self.assertRaises(HouseException):
+            self.house.endBets([(self.ou.id, "over"), ("bogus", "1")])
+
+        with self.assertRaises(HouseException):
+            self.house.endBets([(self.ou.id, "over"), (self.ou.id, "under")])
+
+        # Nothing was paid out.
+        self.assertEqual(self.house.players["Player1"].balance, 30)
+        self.assertIn(self.ou.id, self.house.bets)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import gc
+import unittest
+
+from gooble import House
+from gooble.house import DEFAULT_STARTING_AMOUNT
+from gooble.ledger import EntryTypes
+
+class TestVirtualPlayers(unittest.TestCase):
+
+    def setUp(self):
+        self.house = House("123")
+        self.house.tracker.strict = True
+
+    def test_lookup_stores_nothing(self):
+        version = self.house.version
+        player = self.house.getPlayer("Lurker")
+
+        self.assertTrue(player.virtual)
+        self.assertEqual(player.balance, DEFAULT_STARTING_AMOUNT)
+        self.assertNotIn("Lurker", self.house.players)
+        self.assertEqual(self.house.version, version)
+
+        # The same stand-in comes back while it's still in use.
+        self.assertIs(self.house.getPlayer("Lurker"), player)
+
+        del player
+        gc.collect()
+        self.assertEqual(len(self.house._virtual), 0)
+        self.assertEqual(self.house.json["players"], [])
+
+    def test_materialize_on_change(self):
+        player = self.house.getPlayer("Gifted")
+        player.grant(50, EntryTypes.GIFT)
+
+        self.assertFalse(player.virtual)
+        self.assertIs(self.house.players["Gifted"], player)
+        self.assertIs(self.house.getPlayer("Gifted"), player)
+        self.assertEqual(player.balance, DEFAULT_STARTING_AMOUNT + 50)
+        self.assertTrue(self.house.audit())
+
+    def test_materialize_on_wager(self):
+        other = self.house.getPlayer("Other", 100)
+        player = self.house.getPlayer("Better")
+
+        bet = self.house.newBet("ou", "This is a test bet!")
+        bet.addPlayer(player, 100, "over")
+        bet.addPlayer(other, 100, "under")
+        self.house.endBet(bet.id, "under")
+
+        self.assertEqual(self.house.players["Better"].balance,
+                DEFAULT_STARTING_AMOUNT - 100)
+        self.assertEqual(self.house.players["Better"].losses, 1)
+        self.assertTrue(self.house.audit())
+
+    def test_explicit_balance(self):
+        player = self.house.getPlayer("Rich", 5000)
+
+        self.assertFalse(player.virtual)
+        self.assertIn("Rich", self.house.players)